@@ -0,0 +1,379 @@
+"""
+Benchmarks for the Provider Development Kit.
+
+Run with:
+
+```
+python -m benchmarks
+```
+
+Results are printed as JSON, so that they can be saved and compared between releases:
+
+```
+python -m benchmarks --output results.json
+python -m benchmarks --filter load
+```
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from dataclasses import dataclass
+
+import boto3
+from botocore.stub import Stubber
+from pydantic import BaseModel
+
+import provider
+from provider import access, config, namespace, resources, schema, target, tasks
+from provider.config import loaders
+from provider.runtime import AWSLambdaRuntime
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: typing.Callable[[], typing.Callable[[], typing.Any]]
+    """
+    Registers any classes needed for the benchmark and returns the function to time.
+    The namespace is cleared after each benchmark.
+    """
+    iterations: typing.Optional[int] = None
+    """overrides the default number of iterations, for slow benchmarks"""
+
+
+BENCHMARKS: typing.List[Benchmark] = []
+
+
+def benchmark(name: str, iterations: typing.Optional[int] = None):
+    def actual_decorator(setup):
+        BENCHMARKS.append(Benchmark(name=name, setup=setup, iterations=iterations))
+        return setup
+
+    return actual_decorator
+
+
+def _grant_provider() -> AWSLambdaRuntime:
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+
+    class State(BaseModel):
+        group: str
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        return access.GrantResult(state=State(group=target.group))
+
+    @access.revoke()
+    def revoke(p: Provider, subject: str, target: Target, state: State):
+        pass
+
+    return AWSLambdaRuntime(provider=Provider())
+
+
+def _grant_event(type: str) -> dict:
+    return {
+        "type": type,
+        "data": {
+            "subject": "user@example.com",
+            "target": {"kind": "Target", "arguments": {"group": "admins"}},
+            "state": {"group": "admins"},
+            "request": {"id": "req_123"},
+        },
+    }
+
+
+@benchmark("describe")
+def describe():
+    class Provider(provider.Provider):
+        api_url = provider.String(description="API URL")
+
+    for i in range(20):
+        type(f"Resource{i}", (resources.Resource,), {"__annotations__": {"val": str}})
+
+    @access.target()
+    class Target:
+        group = target.String(title="Group")
+
+    runtime = AWSLambdaRuntime(
+        provider=Provider(), name="bench", publisher="bench", schema_version="v1"
+    )
+    return lambda: runtime.handle(event={"type": "describe"}, context=None)
+
+
+@benchmark("grant")
+def grant():
+    runtime = _grant_provider()
+    event = _grant_event("grant")
+    return lambda: runtime.handle(event=event, context=None)
+
+
+@benchmark("revoke")
+def revoke():
+    runtime = _grant_provider()
+    event = _grant_event("revoke")
+    return lambda: runtime.handle(event=event, context=None)
+
+
+def _load_resources(count: int):
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        email: str
+
+    @resources.loader
+    def load_resources(p: Provider):
+        for i in range(count):
+            resources.register(
+                MyResource(id=str(i), name=f"user {i}", email=f"{i}@example.com")
+            )
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+    event = {"type": "load", "data": {"task": "load_resources"}}
+    return lambda: runtime.handle(event=event, context=None)
+
+
+@benchmark("load_10")
+def load_10():
+    return _load_resources(10)
+
+
+@benchmark("load_10k", iterations=5)
+def load_10k():
+    return _load_resources(10_000)
+
+
+@benchmark("load_100k", iterations=2)
+def load_100k():
+    return _load_resources(100_000)
+
+
+def _fan_out_provider(depth: int, width: int) -> AWSLambdaRuntime:
+    """
+    A provider with a loader which calls a tree of tasks, `depth` levels deep,
+    where each task registers a resource and calls `width` child tasks.
+    """
+
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class FanOut(tasks.Task):
+        path: str
+        level: int
+
+        def run(self, p: Provider):
+            resources.register(MyResource(id=self.path, name=self.path))
+            if self.level < depth:
+                for i in range(width):
+                    tasks.call(FanOut(path=f"{self.path}/{i}", level=self.level + 1))
+
+    @resources.loader
+    def load_tree(p: Provider):
+        for i in range(width):
+            tasks.call(FanOut(path=str(i), level=1))
+
+    return AWSLambdaRuntime(provider=Provider())
+
+
+@benchmark("load_fan_out_1k_tasks")
+def load_fan_out():
+    # a single level of 1000 tasks, returned to the caller
+    runtime = _fan_out_provider(depth=1, width=1000)
+    event = {"type": "load", "data": {"task": "load_tree"}}
+    return lambda: runtime.handle(event=event, context=None)
+
+
+@benchmark("load_fan_out_drain_depth_5", iterations=5)
+def load_fan_out_drain():
+    # 4 + 16 + 64 + 256 + 1024 tasks, executed in-process
+    runtime = _fan_out_provider(depth=5, width=4)
+    event = {"type": "load", "data": {"task": "load_tree", "drain": {}}}
+    return lambda: runtime.handle(event=event, context=None)
+
+
+@benchmark("export_schema")
+def export_schema():
+    class Provider(provider.Provider):
+        api_url = provider.String(description="API URL")
+        api_key = provider.String(description="API key", secret=True)
+
+    for i in range(50):
+        type(f"Resource{i}", (resources.Resource,), {"__annotations__": {"val": str}})
+
+    @access.target()
+    class Target:
+        group = target.String(title="Group")
+
+    return lambda: schema.export_schema()
+
+
+@benchmark("configure_ssm_10_secrets")
+def configure_ssm():
+    fields = {f"secret_{i}": provider.String(secret=True) for i in range(10)}
+    Provider = type("Provider", (provider.Provider,), fields)
+
+    for name in fields.keys():
+        os.environ[f"PROVIDER_SECRET_{name.upper()}"] = f"awsssm:///{name}"
+
+    client = boto3.client("ssm", region_name="us-east-1")
+    stubber = Stubber(client)
+    stubber.activate()
+    configurer = config.Configurer(
+        string_loader=loaders.EnvLoader(),
+        secret_string_loader=loaders.SSMSecretLoader(client=client),
+    )
+    response = {
+        "Parameters": [{"Name": f"/{name}", "Value": "secret"} for name in fields]
+    }
+
+    def run():
+        stubber.add_response("get_parameters", response)
+        configurer.configure(Provider())
+
+    return run
+
+
+_COLD_IMPORT_PROVIDER = """
+import provider
+from provider import access, target
+
+
+class Provider(provider.Provider):
+    pass
+
+
+@access.target()
+class Target:
+    group = target.String()
+
+
+@access.grant()
+def grant(p: Provider, subject: str, target: Target):
+    pass
+"""
+
+
+@benchmark("cold_import_entrypoint", iterations=5)
+def cold_import():
+    """
+    Times importing the AWS Lambda entrypoint in a new interpreter,
+    including the time taken to start the interpreter.
+    """
+    tmp = tempfile.mkdtemp()
+    os.makedirs(os.path.join(tmp, "commonfate_provider_dist"))
+    os.makedirs(os.path.join(tmp, "bench_provider"))
+    open(os.path.join(tmp, "commonfate_provider_dist", "__init__.py"), "w").close()
+    open(os.path.join(tmp, "bench_provider", "__init__.py"), "w").close()
+    with open(os.path.join(tmp, "bench_provider", "provider.py"), "w") as f:
+        f.write(_COLD_IMPORT_PROVIDER)
+    with open(os.path.join(tmp, "commonfate_provider_dist", "manifest.json"), "w") as f:
+        json.dump(
+            {
+                "name": "bench",
+                "version": "v1.0.0",
+                "publisher": "bench",
+                "schema_version": "v1",
+                "python_package": "bench_provider",
+            },
+            f,
+        )
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([tmp, *sys.path])}
+    cmd = [sys.executable, "-c", "from provider.runtime import aws_lambda_entrypoint"]
+
+    def run():
+        subprocess.run(cmd, env=env, check=True)
+
+    run.cleanup = lambda: shutil.rmtree(tmp)
+    return run
+
+
+def run_benchmark(b: Benchmark, iterations: int, warmup: int) -> dict:
+    try:
+        func = b.setup()
+        iterations = b.iterations or iterations
+
+        for _ in range(warmup):
+            func()
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        cleanup = getattr(func, "cleanup", None)
+        if cleanup is not None:
+            cleanup()
+    finally:
+        namespace.clear()
+
+    return {
+        "name": b.name,
+        "iterations": iterations,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "max_ms": max(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PDK benchmarks")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument(
+        "--filter", help="only run benchmarks which contain this string in their name"
+    )
+    parser.add_argument("--output", help="write the results to this file")
+    args = parser.parse_args()
+
+    try:
+        from importlib.metadata import version
+
+        framework_version = version("provider")
+    except Exception:
+        framework_version = None
+
+    results = []
+    for b in BENCHMARKS:
+        if args.filter is not None and args.filter not in b.name:
+            continue
+        print(f"running {b.name}", file=sys.stderr)
+        results.append(run_benchmark(b, iterations=args.iterations, warmup=args.warmup))
+
+    output = {
+        "meta": {
+            "framework": framework_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    out = json.dumps(output, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,12 @@
+import time
+
+_import_started_at = time.perf_counter()
+"""
+When the PDK started being imported. Set before anything else is loaded,
+so that the AWS Lambda entrypoint can report the full cost of importing
+the PDK and its dependencies during a cold start.
+"""
+
 import typing
 from dataclasses import dataclass
 from abc import ABC
@@ -10,13 +19,23 @@ class Field:
     description: typing.Optional[str] = None
     secret: bool = False
     optional: bool = False
+    ttl: typing.Optional[float] = None
+    """
+    For secrets only. If set, the secret is reloaded in the background
+    when it is read more than `ttl` seconds after it was last loaded.
+    """
 
 
 class String(Field):
+    _on_get: typing.Optional[typing.Callable[[], None]] = None
+    """called when the value is read, used to refresh cached secrets"""
+
     def set(self, val: str) -> None:
         self._value = val
 
     def get(self) -> str:
+        if self._on_get is not None:
+            self._on_get()
         return self._value
 
 
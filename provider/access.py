@@ -6,7 +6,7 @@ import typing
 from pydantic import BaseModel
 
 import provider
-from provider import namespace, rpc
+from provider import eventloop, namespace, rpc
 from provider import target as cf_target
 
 _T = typing.TypeVar("_T")
@@ -73,7 +73,95 @@ def grant_validator(
     return actual_decorator
 
 
-GrantFunc = typing.Callable[[typing.Any, str, typing.Any], typing.Optional[GrantResult]]
+GrantFunc = typing.Callable[
+    [typing.Any, str, typing.Any],
+    typing.Union[
+        typing.Optional[GrantResult], typing.Awaitable[typing.Optional[GrantResult]]
+    ],
+]
+
+
+@dataclass
+class CallPlan:
+    """
+    A precompiled plan for calling a @access.grant() or @access.revoke() function.
+
+    The signature of the function is inspected once, when the function is registered,
+    so that calling it only requires initialising the target and building the arguments.
+    """
+
+    func: typing.Callable[..., typing.Any]
+    binder: cf_target.Binder
+    """binds the event arguments to an instance of the target class"""
+    uses_state: bool
+    """whether the function accepts a 'state' argument"""
+    state_model: typing.Optional[typing.Type[BaseModel]]
+    """if set, the state is parsed into this model before calling the function"""
+    uses_request: bool
+    """whether the function accepts a 'request' argument"""
+
+    @classmethod
+    def compile(cls, binder: cf_target.Binder, func: typing.Callable) -> "CallPlan":
+        spec = inspect.getfullargspec(func)
+
+        # check if the function uses state
+        state_anno = spec.annotations.get("state", None)
+        state_model = None
+
+        if state_anno is not None:
+            if isinstance(state_anno, str):
+                # resolve string annotations, which are used if the provider
+                # uses 'from __future__ import annotations'
+                try:
+                    state_anno = typing.get_type_hints(func)["state"]
+                except Exception as e:
+                    raise TypeError(
+                        f"could not resolve the type of the 'state' argument of {func.__name__}: {e}"
+                    )
+
+            if inspect.isclass(state_anno) and issubclass(state_anno, BaseModel):
+                state_model = state_anno
+            elif not _is_dict_annotation(state_anno):
+                raise TypeError(
+                    f"the 'state' argument of {func.__name__} has an unsupported type {state_anno}. The state must be a pydantic BaseModel or a dict"
+                )
+
+        # check if the function uses the request
+        request_anno = spec.annotations.get("request", None)
+
+        return cls(
+            func=func,
+            binder=binder,
+            uses_state=state_anno is not None,
+            state_model=state_model,
+            uses_request=request_anno is not None,
+        )
+
+    def invoke(self, p: provider.Provider, data: rpc.GrantData):
+        t = self.binder.bind(data.target.arguments)
+
+        # initialise the arguments that the function will be called with
+        kwargs = {
+            "p": p,
+            "subject": data.subject,
+            "target": t,
+        }
+
+        if self.uses_state:
+            if self.state_model is not None:
+                kwargs["state"] = self.state_model.parse_obj(data.state)
+            else:
+                kwargs["state"] = data.state
+
+        if self.uses_request:
+            kwargs["request"] = data.request
+
+        return eventloop.resolve(self.func(**kwargs))
+
+
+def _is_dict_annotation(anno: typing.Any) -> bool:
+    return anno is dict or anno is typing.Any or typing.get_origin(anno) is dict
+
 
 _T = typing.TypeVar("_T")
 
@@ -91,6 +179,9 @@ def grant(
         ...
     ```
 
+    The function may also be defined with `async def`, in which case
+    it is run on an event loop shared by the provider.
+
     The `kind` parameter may be specified to indicate a particular target kind
     that this function grants access to.
 
@@ -107,13 +198,18 @@ def grant(
     """
 
     def actual_decorator(func: GrantFunc):
-        namespace.register_grant_func(kind=kind, func=func)
+        registered_target = namespace.register_grant_func(kind=kind, func=func)
+        registered_target.grant_plan = CallPlan.compile(
+            binder=registered_target.binder, func=func
+        )
         return func
 
     return actual_decorator
 
 
-RevokeFunc = typing.Callable[[typing.Any, str, typing.Any], None]
+RevokeFunc = typing.Callable[
+    [typing.Any, str, typing.Any], typing.Union[None, typing.Awaitable[None]]
+]
 
 
 def revoke(
@@ -129,6 +225,9 @@ def revoke(
         ...
     ```
 
+    The function may also be defined with `async def`, in which case
+    it is run on an event loop shared by the provider.
+
     The `kind` parameter may be specified to indicate a particular target kind
     that this function revokes access to.
 
@@ -145,7 +244,10 @@ def revoke(
     """
 
     def actual_decorator(func: RevokeFunc):
-        namespace.register_revoke_func(kind=kind, func=func)
+        registered_target = namespace.register_revoke_func(kind=kind, func=func)
+        registered_target.revoke_plan = CallPlan.compile(
+            binder=registered_target.binder, func=func
+        )
         return func
 
     return actual_decorator
@@ -173,55 +275,21 @@ def call_access_func(
         ...
     ```
 
-    This method inspects the signature of the revoke function, and passes
-    state through if the signature supports it.
+    The signature of the function is inspected when it is registered (see `CallPlan`),
+    and state is passed through if the signature supports it.
     """
+    registered_targets = namespace.get_target_classes()
     try:
-        registered_targets = namespace.get_target_classes()
         registered_target = registered_targets[data.target.kind]
-        args_cls = registered_target.cls
     except KeyError:
         all_keys = ",".join(registered_targets.keys())
         raise KeyError(
             f"unhandled target kind {data.target.kind}, supported kinds are [{all_keys}]"
         )
 
-    t = cf_target._initialise(args_cls, data.target.arguments)
-
     if type == "grant":
-        func = registered_target.get_grant_func()
+        plan = registered_target.get_grant_plan()
     else:
-        func = registered_target.get_revoke_func()
-
-    # initialise the arguments that the revoke() function
-    # will be called by
-    kwargs = {
-        "p": p,
-        "subject": data.subject,
-        "target": t,
-        "state": data.state,
-        "request": data.request,
-    }
-
-    spec = inspect.getfullargspec(func)
-
-    # check if the function uses state
-    state_anno = spec.annotations.get("state", None)
-
-    # if it doesn't, remove it from the arguments
-    # the function is called with
-    if state_anno is None:
-        del kwargs["state"]
-
-    elif issubclass(state_anno, BaseModel):
-        kwargs["state"] = state_anno.parse_obj(data.state)
-
-    # check if the function uses the request
-    request_anno = spec.annotations.get("request", None)
-
-    # if it doesn't, remove it from the arguments
-    # the function is called with
-    if request_anno is None:
-        del kwargs["request"]
+        plan = registered_target.get_revoke_plan()
 
-    return func(**kwargs)
+    return plan.invoke(p=p, data=data)
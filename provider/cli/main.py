@@ -31,6 +31,16 @@ def import_submodules(package, recursive=True):
 
 @click.command()
 def schema():
+    import_provider()
+
+    schema = export_schema().dict(exclude_none=True)
+    print(json.dumps(schema))
+
+
+def import_provider():
+    """
+    Imports the provider package in the current working directory.
+    """
     cwd = os.getcwd()
 
     dirname = os.path.basename(cwd)
@@ -39,9 +49,6 @@ def schema():
     sys.path.append(parent_folder)
     import_submodules(dirname)
 
-    schema = export_schema().dict(exclude_none=True)
-    print(json.dumps(schema))
-
 
 @click.command()
 @click.argument("event")
@@ -49,13 +56,7 @@ def run(event):
     """
     Execute a provider.
     """
-    cwd = os.getcwd()
-
-    dirname = os.path.basename(cwd)
-    parent_folder = os.path.abspath(os.path.join(dirname, "..", ".."))
-
-    sys.path.append(parent_folder)
-    import_submodules(dirname)
+    import_provider()
 
     provider = initialise_provider(configurer=config.DEV_LOADER)
 
@@ -67,8 +68,72 @@ def run(event):
     # redirect stdout to stderr, in case the provider logs any
     # messages using print()
     with redirect_stdout(sys.stderr):
-        result = runtime.handle(event=event_json, context=None)
-    print(json.dumps(result))
+        result = runtime.handle_json(event=event_json, context=None)
+    print(result.decode())
+
+
+CONFIGURERS = {
+    "env": config.DEV_LOADER,
+    "aws-ssm": config.AWS_LAMBDA_LOADER,
+}
+
+
+@click.command()
+@click.option("--http", "http", is_flag=True, help="Serve events over HTTP.")
+@click.option(
+    "--stdio",
+    is_flag=True,
+    help="Read newline-delimited JSON events from stdin and write results to stdout.",
+)
+@click.option("--host", default="0.0.0.0", show_default=True)
+@click.option("--port", default=8080, show_default=True)
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="The maximum number of events to handle concurrently. Defaults to 10 for --http and 1 for --stdio.",
+)
+@click.option(
+    "--secrets",
+    type=click.Choice(list(CONFIGURERS.keys())),
+    default="env",
+    show_default=True,
+    help="Where to load secret config values from.",
+)
+def serve(http, stdio, host, port, workers, secrets):
+    """
+    Initialise a provider once and serve events to it.
+    """
+    if http == stdio:
+        raise click.UsageError("exactly one of --http or --stdio must be specified")
+
+    if workers is None:
+        workers = 1 if stdio else 10
+
+    if stdio:
+        from provider.runtime import stdio as stdio_runtime
+
+        # stdout is reserved for results, so anything printed while the
+        # provider is imported and initialised is redirected to stderr.
+        output = sys.stdout
+        with redirect_stdout(sys.stderr):
+            import_provider()
+            provider = initialise_provider(configurer=CONFIGURERS[secrets])
+
+        runtime = AWSLambdaRuntime(provider=provider)
+        stdio_runtime.serve(runtime=runtime, output=output, max_workers=workers)
+        return
+
+    import_provider()
+
+    provider = initialise_provider(configurer=CONFIGURERS[secrets])
+
+    runtime = AWSLambdaRuntime(provider=provider)
+
+    from provider.runtime import http as http_runtime
+
+    click.echo(f"serving provider events on http://{host}:{port}", err=True)
+    http_runtime.serve(runtime=runtime, host=host, port=port, max_workers=workers)
 
 
 @click.group()
@@ -78,6 +143,7 @@ def cli():
 
 cli.add_command(schema)
 cli.add_command(run)
+cli.add_command(serve)
 
 if __name__ == "__main__":
     cli()
@@ -1,8 +1,6 @@
 import typing
-import boto3
-from botocore.exceptions import ClientError
 from dataclasses import dataclass
-from provider.config import loaders
+from provider.config import cache, loaders
 import provider
 
 
@@ -47,9 +45,56 @@ class Configurer:
         all_vars = [
             (k, v) for (k, v) in vars(p.__class__).items() if not k.startswith("__")
         ]
+        secrets: typing.Dict[str, provider.String] = {}
+
         for k, v in all_vars:
             if isinstance(v, provider.String):
-                self.resolve_string(p=p, key=k, val=v)
+                if v.secret is True:
+                    # secrets are collected and resolved together,
+                    # as loading them may require calls to a remote service.
+                    secrets[k] = v
+                else:
+                    self.resolve_string(p=p, key=k, val=v)
+
+        if len(secrets) > 0:
+            self.resolve_secrets(p=p, secrets=secrets)
+
+    def resolve_secrets(
+        self, p: provider.Provider, secrets: typing.Dict[str, provider.String]
+    ):
+        """
+        Resolves multiple secret config values using a single call to the
+        secret string loader's `load_secret_strings()` method.
+        """
+        resolved = self.secret_string_loader.load_secret_strings(list(secrets.keys()))
+        secret_cache = None
+
+        for key, val in secrets.items():
+            result = resolved.get(key)
+            if result is None:
+                result = loaders.NotFoundError(f"secret {key} was not loaded")
+
+            if isinstance(result, loaders.NotFoundError):
+                # if we get here, we didn't find a value for the config variable
+                # this is fine if the variable is optional, but otherwise we raise an exception
+                if val.optional is False:
+                    p.diagnostics.error(f"config {key} is required: {result}")
+                continue
+
+            val.set(result.value)
+            setattr(p, key, val)
+
+            # set the value in the safe config dict to the ref,
+            # as the value is sensitive.
+            p._safe_config[key] = result.ref
+
+            if val.ttl is not None:
+                # the secret should be reloaded once the TTL expires
+                if secret_cache is None:
+                    secret_cache = cache.SecretCache(
+                        p=p, secret_string_loader=self.secret_string_loader
+                    )
+                secret_cache.add(key=key, val=val)
 
     def resolve_string(self, p: provider.Provider, key: str, val: provider.String):
         try:
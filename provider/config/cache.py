@@ -0,0 +1,82 @@
+import threading
+import time
+import typing
+
+import provider
+from provider.config import loaders
+
+
+class SecretCache:
+    """
+    Keeps secret config values fresh in warm containers.
+
+    Secret fields with a `ttl` are added to the cache when the provider is configured.
+    When the value of a field is read with `String.get()` after its TTL has expired,
+    the current value is returned straight away and the secret is reloaded using
+    `secret_string_loader` on a background thread. Reading a secret never waits
+    for the secret to be reloaded.
+
+    If reloading a secret fails, the current value is kept and the secret
+    is reloaded again once the TTL has expired.
+    """
+
+    def __init__(
+        self,
+        p: provider.Provider,
+        secret_string_loader: loaders.SecretStringLoader,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.p = p
+        self.secret_string_loader = secret_string_loader
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._expires_at: typing.Dict[str, float] = {}
+        self._refreshing: typing.Dict[str, threading.Thread] = {}
+
+    def add(self, key: str, val: provider.String):
+        """
+        Adds a secret field to the cache. The field must already have a value.
+        """
+        if val.ttl is None:
+            raise ValueError(f"secret {key} can't be cached as it has no ttl")
+
+        self._expires_at[key] = self.clock() + val.ttl
+        val._on_get = lambda: self._on_get(key, val)
+
+    def _on_get(self, key: str, val: provider.String):
+        if self.clock() < self._expires_at[key]:
+            return
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(
+                target=self._refresh,
+                args=(key, val),
+                name=f"provider-secret-refresh-{key}",
+                daemon=True,
+            )
+            self._refreshing[key] = thread
+
+        thread.start()
+
+    def _refresh(self, key: str, val: provider.String):
+        try:
+            secret = self.secret_string_loader.load_secret_string(key)
+            val.set(secret.value)
+            self.p._safe_config[key] = secret.ref
+        except Exception as e:
+            self.p.diagnostics.info(f"refreshing secret {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._expires_at[key] = self.clock() + val.ttl
+                del self._refreshing[key]
+
+    def wait(self, timeout: typing.Optional[float] = None):
+        """
+        Waits for any secrets which are being refreshed to finish reloading.
+        """
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
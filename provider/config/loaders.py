@@ -1,6 +1,5 @@
 import os
-import boto3
-from botocore.exceptions import ClientError
+import typing
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
@@ -49,6 +48,29 @@ class SecretStringLoader(ABC):
         """
         pass
 
+    def load_secret_strings(
+        self, field_names: typing.List[str]
+    ) -> typing.Dict[str, typing.Union[Secret, NotFoundError]]:
+        """
+        Load multiple config secret string values at once.
+
+        Returns a dict keyed by field name. Each value is either the
+        resolved Secret, or the NotFoundError raised for that field,
+        so that a single missing secret doesn't prevent the others
+        from being resolved.
+
+        The default implementation calls `load_secret_string` for each field.
+        Loaders backed by a remote service should override this to
+        resolve the fields in as few calls as possible.
+        """
+        results: typing.Dict[str, typing.Union[Secret, NotFoundError]] = {}
+        for field_name in field_names:
+            try:
+                results[field_name] = self.load_secret_string(field_name)
+            except NotFoundError as e:
+                results[field_name] = e
+        return results
+
 
 class EnvLoader(StringLoader):
     def load_string(self, field_name: str) -> str:
@@ -117,7 +139,27 @@ class SSMSecretLoader(SecretStringLoader):
     Secret Loader for AWS SSM
     """
 
-    def load_secret_string(self, field_name: str) -> Secret:
+    MAX_PARAMETERS_PER_CALL = 10
+    """the maximum number of names accepted by a single SSM GetParameters call"""
+
+    def __init__(self, client=None) -> None:
+        self._client = client
+
+    @property
+    def client(self):
+        """
+        The SSM client is created on first use and shared between calls,
+        so that resolving many secrets only constructs a single client.
+        """
+        if self._client is None:
+            # boto3 is slow to import, so it is only loaded
+            # when a secret needs to be resolved.
+            import boto3
+
+            self._client = boto3.client("ssm")
+        return self._client
+
+    def _secret_ref(self, field_name: str) -> str:
         """
         The field name is transformed to an env var in the following
         format - `PROVIDER_SECRET_FIELD_NAME`
@@ -131,13 +173,19 @@ class SSMSecretLoader(SecretStringLoader):
         if secret_ref is None:
             raise NotFoundError(f"{env_var} environment variable is not set")
 
+        return secret_ref
+
+    def load_secret_string(self, field_name: str) -> Secret:
+        secret_ref = self._secret_ref(field_name)
+
         # secret ref is in the format 'awsssm:///path/to/secret'
         # trim the awsssm:// part out
         secret_path = secret_ref.removeprefix("awsssm://")
 
-        client = boto3.client("ssm")
+        from botocore.exceptions import ClientError
+
         try:
-            res = client.get_parameter(Name=secret_path, WithDecryption=True)
+            res = self.client.get_parameter(Name=secret_path, WithDecryption=True)
 
             return Secret(ref=f"{secret_ref}", value=res["Parameter"]["Value"])
 
@@ -148,3 +196,55 @@ class SSMSecretLoader(SecretStringLoader):
                 )
             else:
                 raise e
+
+    def load_secret_strings(
+        self, field_names: typing.List[str]
+    ) -> typing.Dict[str, typing.Union[Secret, NotFoundError]]:
+        """
+        Resolves the secrets using batched SSM GetParameters calls,
+        with up to 10 parameter names per call.
+        """
+        results: typing.Dict[str, typing.Union[Secret, NotFoundError]] = {}
+
+        # map each SSM parameter path to the fields which reference it
+        fields_by_path: typing.Dict[str, typing.List[str]] = {}
+        refs: typing.Dict[str, str] = {}
+        for field_name in field_names:
+            try:
+                secret_ref = self._secret_ref(field_name)
+            except NotFoundError as e:
+                results[field_name] = e
+                continue
+
+            secret_path = secret_ref.removeprefix("awsssm://")
+            fields_by_path.setdefault(secret_path, []).append(field_name)
+            refs[field_name] = secret_ref
+
+        paths = list(fields_by_path.keys())
+        for i in range(0, len(paths), self.MAX_PARAMETERS_PER_CALL):
+            batch = paths[i : i + self.MAX_PARAMETERS_PER_CALL]
+            res = self.client.get_parameters(Names=batch, WithDecryption=True)
+
+            for param in res.get("Parameters", []):
+                for field_name in fields_by_path.get(param["Name"], []):
+                    results[field_name] = Secret(
+                        ref=refs[field_name], value=param["Value"]
+                    )
+
+            for path in res.get("InvalidParameters", []):
+                for field_name in fields_by_path.get(path, []):
+                    results[field_name] = NotFoundError(
+                        f"The AWS SSM parameter '{refs[field_name]}' was not found"
+                    )
+
+        # SSM may report a parameter under a different name than requested
+        # (for example, if a version selector was used in the path).
+        # Fall back to loading these individually.
+        for field_name in refs.keys():
+            if field_name not in results:
+                try:
+                    results[field_name] = self.load_secret_string(field_name)
+                except NotFoundError as e:
+                    results[field_name] = e
+
+        return results
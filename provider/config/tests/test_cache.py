@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+import provider
+from provider import namespace
+from provider.config import cache, loaders
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    """clear the registered provider, targets etc between test runs"""
+    yield
+    namespace.clear()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class BlockingLoader(loaders.DictLoader):
+    """
+    Waits for `unblock` to be set before loading a secret,
+    to simulate a slow call to a remote service.
+    """
+
+    def __init__(self, config_dict: dict) -> None:
+        super().__init__(config_dict)
+        self.unblock = threading.Event()
+        self.unblock.set()
+
+    def load_secret_string(self, field_name: str) -> loaders.Secret:
+        self.unblock.wait()
+        return super().load_secret_string(field_name)
+
+
+def _cached_provider(config: dict):
+    class ExampleProvider(provider.Provider):
+        value = provider.String(secret=True, ttl=60)
+
+    p = ExampleProvider()
+    loader = BlockingLoader(config)
+    clock = FakeClock()
+    secret_cache = cache.SecretCache(p=p, secret_string_loader=loader, clock=clock)
+
+    p.value.set(config["value"])
+    secret_cache.add(key="value", val=p.value)
+
+    return p, loader, clock, secret_cache
+
+
+def test_secret_cache_refreshes_after_ttl():
+    p, loader, clock, secret_cache = _cached_provider({"value": "first"})
+    loader.config["value"] = "second"
+
+    # the TTL hasn't expired, so the value shouldn't be refreshed
+    assert p.value.get() == "first"
+    secret_cache.wait()
+    assert p.value.get() == "first"
+
+    clock.now = 61
+    loader.unblock.clear()
+
+    # the stale value is returned while the secret is refreshed
+    assert p.value.get() == "first"
+    loader.unblock.set()
+    secret_cache.wait()
+    assert p.value.get() == "second"
+    assert p._safe_config["value"] == "dict://value"
+
+
+def test_secret_cache_keeps_value_if_refresh_fails():
+    p, loader, clock, secret_cache = _cached_provider({"value": "first"})
+    del loader.config["value"]
+
+    clock.now = 61
+    p.value.get()
+    secret_cache.wait()
+
+    assert p.value.get() == "first"
+    assert p.healthy() == True
+    assert "refreshing secret value failed" in p.diagnostics.logs[0].msg
+
+
+def test_configurer_caches_secrets_with_ttl():
+    class ExampleProvider(provider.Provider):
+        cached = provider.String(secret=True, ttl=60)
+        not_cached = provider.String(secret=True)
+
+    loader = loaders.DictLoader({"cached": "a", "not_cached": "b"})
+    configurer = provider.config.Configurer(
+        string_loader=loader, secret_string_loader=loader
+    )
+
+    p = ExampleProvider()
+    configurer.configure(p)
+
+    assert p.cached._on_get is not None
+    assert p.not_cached._on_get is None
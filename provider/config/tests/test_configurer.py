@@ -39,3 +39,37 @@ def test_configurer_works_with_secrets():
 
     # should be loaded through the secret loader
     assert p.value.get() == "something_secret"
+
+
+def test_configurer_resolves_secrets_in_bulk():
+    class ExampleProvider(provider.Provider):
+        first = provider.String(secret=True)
+        second = provider.String(secret=True)
+        missing = provider.String(secret=True)
+        optional = provider.String(secret=True, optional=True)
+
+    calls = []
+
+    class BulkLoader(loaders.DictLoader):
+        def load_secret_strings(self, field_names):
+            calls.append(field_names)
+            return super().load_secret_strings(field_names)
+
+    loader = BulkLoader({"first": "first_secret", "second": "second_secret"})
+    configurer = config.Configurer(string_loader=loader, secret_string_loader=loader)
+
+    p = ExampleProvider()
+    configurer.configure(p)
+
+    # all secrets should be resolved through a single bulk call
+    assert calls == [["first", "second", "missing", "optional"]]
+
+    assert p.first.get() == "first_secret"
+    assert p.second.get() == "second_secret"
+    assert p._safe_config["first"] == "dict://first"
+
+    # only the required missing secret should be reported
+    errors = [l.msg for l in p.diagnostics.logs if l.level == "ERROR"]
+    assert errors == [
+        "config missing is required: secret missing is not set in config_dict"
+    ]
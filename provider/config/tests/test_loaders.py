@@ -1,4 +1,8 @@
 import os
+
+import boto3
+from botocore.stub import Stubber
+
 from provider.config import loaders
 
 
@@ -34,3 +38,62 @@ def test_dict_loader_secrets_works():
     want = loaders.Secret(ref="dict://value", value="something")
 
     assert got == want
+
+
+def _stubbed_ssm_client():
+    client = boto3.client("ssm", region_name="us-east-1")
+    return client, Stubber(client)
+
+
+def test_ssm_loader_batches_get_parameters(monkeypatch):
+    field_names = [f"secret_{i}" for i in range(12)]
+    for name in field_names:
+        monkeypatch.setenv(f"PROVIDER_SECRET_{name.upper()}", f"awsssm:///{name}")
+
+    client, stubber = _stubbed_ssm_client()
+
+    # the first call should contain the first 10 names
+    stubber.add_response(
+        "get_parameters",
+        {
+            "Parameters": [
+                {"Name": f"/{name}", "Value": f"value_{name}"}
+                for name in field_names[:10]
+            ],
+        },
+        {"Names": [f"/{name}" for name in field_names[:10]], "WithDecryption": True},
+    )
+    # the second call should contain the remaining names
+    stubber.add_response(
+        "get_parameters",
+        {
+            "Parameters": [{"Name": "/secret_10", "Value": "value_secret_10"}],
+            "InvalidParameters": ["/secret_11"],
+        },
+        {"Names": ["/secret_10", "/secret_11"], "WithDecryption": True},
+    )
+
+    loader = loaders.SSMSecretLoader(client=client)
+    with stubber:
+        got = loader.load_secret_strings(field_names)
+
+    stubber.assert_no_pending_responses()
+
+    assert got["secret_0"] == loaders.Secret(
+        ref="awsssm:///secret_0", value="value_secret_0"
+    )
+    assert got["secret_10"] == loaders.Secret(
+        ref="awsssm:///secret_10", value="value_secret_10"
+    )
+    assert isinstance(got["secret_11"], loaders.NotFoundError)
+
+
+def test_ssm_loader_reports_missing_env_var(monkeypatch):
+    monkeypatch.delenv("PROVIDER_SECRET_NOT_SET", raising=False)
+    client, stubber = _stubbed_ssm_client()
+
+    loader = loaders.SSMSecretLoader(client=client)
+    with stubber:
+        got = loader.load_secret_strings(["not_set"])
+
+    assert isinstance(got["not_set"], loaders.NotFoundError)
@@ -1,4 +1,7 @@
-from dataclasses import dataclass, asdict
+from collections import deque
+from dataclasses import dataclass
+import threading
+import time
 import typing
 
 
@@ -6,27 +9,93 @@ import typing
 class Log:
     level: typing.Literal["INFO", "ERROR"]
     msg: str
+    timestamp: typing.Optional[float] = None
+    """the time the message was logged, as a Unix timestamp. Only set if timestamps are enabled."""
+    fields: typing.Optional[dict] = None
+    """structured fields associated with the message"""
+
+    def export(self) -> dict:
+        exported = {"level": self.level, "msg": self.msg}
+        if self.timestamp is not None:
+            exported["timestamp"] = self.timestamp
+        if self.fields is not None:
+            exported["fields"] = self.fields
+        return exported
+
+
+DEFAULT_MAX_LOGS = 1000
 
 
 class Logs:
-    logs: typing.List[Log]
+    """
+    Diagnostic log messages.
+
+    At most `max_logs` messages are kept. Once the limit is reached the oldest
+    messages are dropped, and the number of dropped messages is counted.
+    The number of messages logged at each level includes dropped messages,
+    so an error continues to mark the provider as unhealthy after it is dropped.
+    """
+
+    logs: typing.Deque[Log]
 
-    def __init__(self) -> None:
-        self.logs = []
+    def __init__(
+        self, max_logs: int = DEFAULT_MAX_LOGS, timestamps: bool = False
+    ) -> None:
+        self.logs = deque(maxlen=max_logs)
+        self.timestamps = timestamps
+        self.info_count = 0
+        self.error_count = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
 
-    def info(self, msg: str):
-        self.logs.append(Log("INFO", msg=msg))
+    def info(self, msg: str, **fields: typing.Any):
+        self._append("INFO", msg, fields)
 
-    def error(self, msg: str):
-        self.logs.append(Log("ERROR", msg=msg))
+    def error(self, msg: str, **fields: typing.Any):
+        self._append("ERROR", msg, fields)
+
+    def _append(
+        self,
+        level: typing.Literal["INFO", "ERROR"],
+        msg: str,
+        fields: typing.Dict[str, typing.Any],
+    ):
+        log = Log(
+            level,
+            msg=msg,
+            timestamp=time.time() if self.timestamps else None,
+            fields=fields if len(fields) > 0 else None,
+        )
+
+        with self._lock:
+            if len(self.logs) == self.logs.maxlen:
+                self.dropped += 1
+            self.logs.append(log)
+
+            if level == "ERROR":
+                self.error_count += 1
+            else:
+                self.info_count += 1
 
     def has_no_errors(self) -> bool:
-        has_error = any([l for l in self.logs if l.level == "ERROR"])
-        return not has_error
+        return self.error_count == 0
 
     def export_logs(self) -> typing.List[dict]:
         """
         Returns the diagnostic logs as a list of simple dict objects
         so that it can be easily serialised as JSON.
         """
-        return [asdict(l) for l in self.logs]
+        with self._lock:
+            exported = [l.export() for l in self.logs]
+            dropped = self.dropped
+
+        if dropped > 0:
+            exported.insert(
+                0,
+                {
+                    "level": "INFO",
+                    "msg": f"{dropped} older diagnostic messages were dropped",
+                },
+            )
+
+        return exported
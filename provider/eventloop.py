@@ -0,0 +1,70 @@
+"""
+Module eventloop runs the coroutines returned by `async def` provider functions,
+like grant and revoke functions, resource loaders and `Task.run` methods.
+
+Coroutines are run on a single event loop which is shared by the container.
+The loop runs on a background thread, so it is reused between warm invocations
+and can be used by runtimes which call provider functions from multiple threads.
+
+asyncio is slow to import, so it is only loaded once a provider function
+returns a coroutine. Providers without `async def` functions never load it.
+"""
+
+import inspect
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import asyncio
+
+_T = typing.TypeVar("_T")
+
+_LOOP: typing.Optional["asyncio.AbstractEventLoop"] = None
+
+_LOOP_THREAD: typing.Optional[threading.Thread] = None
+
+_LOOP_LOCK = threading.Lock()
+
+
+def get_loop() -> "asyncio.AbstractEventLoop":
+    """
+    Returns the shared event loop, starting it if it isn't already running.
+    """
+    import asyncio
+
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_THREAD = threading.Thread(
+                target=_LOOP.run_forever, name="provider-event-loop", daemon=True
+            )
+            _LOOP_THREAD.start()
+        return _LOOP
+
+
+def resolve(result: typing.Union[_T, typing.Awaitable[_T]]) -> _T:
+    """
+    Returns the result of calling a provider function. If the function is
+    `async def`, the returned coroutine is run to completion on the shared
+    event loop first.
+    """
+    if not inspect.isawaitable(result):
+        return result
+
+    import asyncio
+
+    loop = get_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        raise RuntimeError(
+            "cannot wait for a coroutine from the provider event loop thread, use 'await' instead"
+        )
+
+    future = asyncio.run_coroutine_threadsafe(_await(result), loop)
+    return future.result()
+
+
+async def _await(awaitable: typing.Awaitable[_T]) -> _T:
+    # run_coroutine_threadsafe only accepts coroutines,
+    # so wrap any other awaitable in one.
+    return await awaitable
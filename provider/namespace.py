@@ -13,8 +13,11 @@ import typing
 
 if typing.TYPE_CHECKING:
     from provider.provider import Provider, ConfigValidator
-    from provider.resources import Resource
+    from provider.resources import Resource, _RowBuffer
+    from provider.target import Binder
+    from provider.tasks import Task
     from provider.access import (
+        CallPlan,
         GrantFunc,
         RevokeFunc,
         GrantValidator,
@@ -27,6 +30,9 @@ _PROVIDER: typing.Optional[typing.Type["Provider"]] = None
 _ALL_RESOURCES: typing.List["Resource"] = []
 """instances of particular resources. Updated when resources.register() is called."""
 
+_RESOURCE_BUFFERS: typing.Dict[typing.Type["Resource"], "_RowBuffer"] = {}
+"""compact buffers of resources, by resource class. Updated when resources.register_many() is called."""
+
 _RESOURCE_CLASSES: typing.List[typing.Type["Resource"]] = []
 """the resource classes themselves. Updated when a class subclasses resources.Resource"""
 
@@ -34,12 +40,21 @@ _ALL_GRANT_VALIDATORS: typing.Dict[str, typing.Dict[str, "GrantValidator"]] = {}
 
 _ALL_CONFIG_VALIDATORS: typing.Dict[str, "ConfigValidator"] = {}
 
+_GENERATION = 0
+"""
+Incremented whenever a class or function is registered, or the namespace is cleared.
+Used to invalidate anything derived from the registered classes, like the provider schema.
+"""
+
 
 @dataclass
 class Target:
     cls: typing.Any
+    binder: "Binder"
     grant_func: typing.Optional["GrantFunc"] = None
     revoke_func: typing.Optional["RevokeFunc"] = None
+    grant_plan: typing.Optional["CallPlan"] = None
+    revoke_plan: typing.Optional["CallPlan"] = None
 
     def get_revoke_func(self) -> "RevokeFunc":
         if self.revoke_func is None:
@@ -51,15 +66,43 @@ class Target:
             raise Exception("grant function is not defined for this target")
         return self.grant_func
 
+    def get_revoke_plan(self) -> "CallPlan":
+        if self.revoke_plan is None:
+            raise Exception("revoke function is not defined for this target")
+        return self.revoke_plan
+
+    def get_grant_plan(self) -> "CallPlan":
+        if self.grant_plan is None:
+            raise Exception("grant function is not defined for this target")
+        return self.grant_plan
+
 
 _TARGET_CLASSES: typing.Dict[str, Target] = {}
 
+_TARGET_BINDERS: typing.Dict[typing.Type[typing.Any], "Binder"] = {}
+"""binders for the registered target classes, indexed by class"""
+
 
 LoaderFunc = typing.Callable[[typing.Any], None]
 
 
 _RESOURCE_LOADERS: typing.Dict[str, LoaderFunc] = {}
 
+_TASK_CLASSES: typing.Dict[str, typing.Type["Task"]] = {}
+"""task classes, indexed by name. Updated when a class subclasses tasks.Task"""
+
+
+def _changed():
+    global _GENERATION
+    _GENERATION += 1
+
+
+def get_generation() -> int:
+    """
+    Returns a counter which changes whenever the registered classes and functions change.
+    """
+    return _GENERATION
+
 
 def register_provider(provider_class: typing.Type["Provider"]):
     """
@@ -72,10 +115,17 @@ def register_provider(provider_class: typing.Type["Provider"]):
         )
 
     _PROVIDER = provider_class
+    _changed()
 
 
 def register_target_class(kind: str, target_class: typing.Type[typing.Any]):
-    _TARGET_CLASSES[kind] = Target(cls=target_class)
+    # imported here as the target module imports this module
+    from provider.target import Binder
+
+    _changed()
+    binder = Binder(target_class)
+    _TARGET_CLASSES[kind] = Target(cls=target_class, binder=binder)
+    _TARGET_BINDERS[target_class] = binder
 
 
 _T = typing.TypeVar("_T")
@@ -83,14 +133,18 @@ _T = typing.TypeVar("_T")
 KindType = typing.Optional[typing.Union[typing.Type[_T], str]]
 
 
-def register_grant_func(kind: KindType, func: "GrantFunc"):
+def register_grant_func(kind: KindType, func: "GrantFunc") -> Target:
+    _changed()
     kind_str = _lookup_kind(kind=kind, function_type="grant function")
     _TARGET_CLASSES[kind_str].grant_func = func
+    return _TARGET_CLASSES[kind_str]
 
 
-def register_revoke_func(kind: KindType, func: "RevokeFunc"):
+def register_revoke_func(kind: KindType, func: "RevokeFunc") -> Target:
+    _changed()
     kind_str = _lookup_kind(kind=kind, function_type="revoke function")
     _TARGET_CLASSES[kind_str].revoke_func = func
+    return _TARGET_CLASSES[kind_str]
 
 
 def _lookup_kind(kind: KindType, function_type: str) -> str:
@@ -119,22 +173,56 @@ def _lookup_kind(kind: KindType, function_type: str) -> str:
 
 
 def register_resource_class(resource_class: typing.Type["Resource"]):
+    _changed()
     _RESOURCE_CLASSES.append(resource_class)
 
 
 def register_resource_loader(func: LoaderFunc):
+    _changed()
+    if func.__name__ in _TASK_CLASSES:
+        raise Exception(
+            f"Tried to register a resource loader {func.__name__} but a task class with the same name has already been registered. Resource loaders and tasks must have unique names."
+        )
     _RESOURCE_LOADERS[func.__name__] = func
 
 
+def register_task_class(task_class: typing.Type["Task"]):
+    name = task_class.__name__
+    existing = _TASK_CLASSES.get(name)
+    if existing is not None and not _is_same_class(existing, task_class):
+        raise Exception(
+            f"Tried to register a task class {task_class.__module__}.{task_class.__qualname__} but an existing task class has already been registered with the same name ({existing.__module__}.{existing.__qualname__}). Task classes must have unique names."
+        )
+    if name in _RESOURCE_LOADERS:
+        raise Exception(
+            f"Tried to register a task class {name} but a resource loader with the same name has already been registered. Resource loaders and tasks must have unique names."
+        )
+    _changed()
+    _TASK_CLASSES[name] = task_class
+
+
+def _is_same_class(first: type, second: type) -> bool:
+    """
+    Returns True if the classes have the same qualified name,
+    which is the case if a module has been reloaded.
+    """
+    return (
+        first.__module__ == second.__module__
+        and first.__qualname__ == second.__qualname__
+    )
+
+
 def register_grant_validator(
     kind: KindType, id: str, grant_validator: "GrantValidator"
 ):
+    _changed()
     kind_str = _lookup_kind(kind=kind, function_type="grant validator")
     _ALL_GRANT_VALIDATORS.setdefault(kind_str, {})
     _ALL_GRANT_VALIDATORS[kind_str][id] = grant_validator
 
 
 def register_config_validator(id: str, config_validator: "ConfigValidator"):
+    _changed()
     _ALL_CONFIG_VALIDATORS[id] = config_validator
 
 
@@ -158,10 +246,24 @@ def get_resource_loaders() -> typing.Dict[str, LoaderFunc]:
     return _RESOURCE_LOADERS
 
 
+def get_task_classes() -> typing.Dict[str, typing.Type["Task"]]:
+    return _TASK_CLASSES
+
+
 def get_target_classes() -> typing.Dict[str, typing.Type[Target]]:
     return _TARGET_CLASSES
 
 
+def get_target_binder(
+    target_class: typing.Type[typing.Any],
+) -> typing.Optional["Binder"]:
+    """
+    Returns the binder compiled when the target class was registered,
+    or None if the class isn't registered.
+    """
+    return _TARGET_BINDERS.get(target_class)
+
+
 def get_config_validators():
     return _ALL_CONFIG_VALIDATORS
 
@@ -172,10 +274,14 @@ def clear():
 
     Used for testing only.
     """
-    global _PROVIDER, _ALL_RESOURCES, _RESOURCE_CLASSES, _RESOURCE_LOADERS, _TARGET_CLASSES, _ALL_GRANT_VALIDATORS
+    global _PROVIDER, _ALL_RESOURCES, _RESOURCE_BUFFERS, _RESOURCE_CLASSES, _RESOURCE_LOADERS, _TASK_CLASSES, _TARGET_CLASSES, _TARGET_BINDERS, _ALL_GRANT_VALIDATORS
     _PROVIDER = None
     _ALL_RESOURCES = []
+    _RESOURCE_BUFFERS = {}
     _RESOURCE_CLASSES = []
     _RESOURCE_LOADERS = {}
+    _TASK_CLASSES = {}
     _TARGET_CLASSES = {}
+    _TARGET_BINDERS = {}
     _ALL_GRANT_VALIDATORS = {}
+    _changed()
@@ -1,5 +1,10 @@
+from dataclasses import dataclass
+import hashlib
+import json
+import time
+import types
 import typing
-from provider import namespace, tasks
+from provider import eventloop, namespace, tasks
 from pydantic import BaseModel, Field
 import inspect
 from common_fate_schema.provider import v1alpha1
@@ -9,6 +14,15 @@ def composite_id(fields: typing.List[str]):
     return "/".join(fields)
 
 
+def fingerprint(exported: dict) -> str:
+    """
+    Returns a stable hash of the contents of a resource,
+    in the format returned by `export_json()`.
+    """
+    content = json.dumps(exported, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
 class BaseResource(BaseModel):
     #  A resource with no name. Usually you'll want to subclass resources.Resource instead.
 
@@ -19,11 +33,20 @@ class BaseResource(BaseModel):
         return super().__init_subclass__()
 
     def export_json(self) -> dict:
-        data = dict(self)
+        data = self._export_fields()
         id = data.pop("id")
         output = {"type": self.__class__.__name__, "id": id, "data": data}
         return output
 
+    def _export_fields(self) -> dict:
+        """
+        Returns the fields of the resource as plain JSON values. Fields which
+        may contain nested models are converted to dicts.
+        """
+        if _has_plain_fields(self.__class__):
+            return dict(self)
+        return self.dict()
+
     class Config:
         @staticmethod
         def schema_extra(
@@ -54,13 +77,45 @@ class Resource(BaseResource):
     name: str
 
     def export_json(self) -> dict:
-        data = dict(self)
+        data = self._export_fields()
         id = data.pop("id")
         name = data.pop("name")
         output = {"type": self.__class__.__name__, "id": id, "name": name, "data": data}
         return output
 
 
+_PLAIN_TYPES = (str, int, float, bool)
+
+_PLAIN_CLASSES: typing.Dict[typing.Type[BaseResource], bool] = {}
+"""whether each resource class has only plain fields, cached by _has_plain_fields()"""
+
+
+def _has_plain_fields(resource_class: typing.Type[BaseResource]) -> bool:
+    """
+    Returns True if every field of the resource class holds a plain JSON value
+    (or an optional value, list or dict of them), so the field values can be
+    exported as-is rather than being converted by pydantic.
+    """
+    plain = _PLAIN_CLASSES.get(resource_class)
+    if plain is None:
+        plain = all(f.type_ in _PLAIN_TYPES for f in resource_class.__fields__.values())
+        _PLAIN_CLASSES[resource_class] = plain
+    return plain
+
+
+def _to_plain(val: typing.Any) -> typing.Any:
+    """
+    Converts any models in a value to dicts, as `BaseModel.dict()` does.
+    """
+    if isinstance(val, BaseModel):
+        return val.dict()
+    if isinstance(val, dict):
+        return {k: _to_plain(v) for k, v in val.items()}
+    if isinstance(val, (list, tuple)):
+        return [_to_plain(v) for v in val]
+    return val
+
+
 T = typing.TypeVar("T", bound=BaseResource)
 
 
@@ -73,41 +128,424 @@ def Related(
 
 
 def loader(func: tasks.LoaderFunc):
+    """
+    Register a function as a resource loader.
+
+    The function may also be defined with `async def`, in which case
+    it is run on an event loop shared by the provider.
+    """
     namespace.register_resource_loader(func)
     return func
 
 
+@dataclass
+class Page:
+    """
+    A page of resources returned by a page fetching function.
+    """
+
+    resources: typing.List[BaseResource]
+    cursor: typing.Optional[str] = None
+    """the cursor to fetch the next page with, or None if this is the last page"""
+
+
+PageFunc = typing.Callable[
+    [typing.Any, typing.Optional[str]], typing.Union[Page, typing.Awaitable[Page]]
+]
+
+
+def paginate(
+    p: typing.Any,
+    fetch_page: PageFunc,
+    continuation: typing.Callable[[str], tasks.Task],
+    cursor: typing.Optional[str] = None,
+    max_pages: typing.Optional[int] = None,
+    max_resources: typing.Optional[int] = None,
+    max_duration_ms: typing.Optional[int] = None,
+):
+    """
+    Fetches pages of resources with `fetch_page(p, cursor)`, starting at `cursor`,
+    and registers the resources in each page.
+
+    Pages are fetched until there are none left, or one of the limits is reached
+    or the load event's deadline is reached. At least one page is always fetched.
+    If there are more pages, `tasks.call(continuation(cursor))` is called so that
+    the remaining pages are fetched by another task.
+
+    `fetch_page` may also be defined with `async def`. This function waits for the
+    pages to be fetched, so it must not be called from an `async def` function.
+    """
+    started_at = time.monotonic()
+    pages = 0
+    registered = 0
+
+    while True:
+        page: Page = eventloop.resolve(fetch_page(p, cursor))
+        for r in page.resources:
+            register(r)
+        pages += 1
+        registered += len(page.resources)
+
+        cursor = page.cursor
+        if cursor is None:
+            return
+
+        if (
+            (max_pages is not None and pages >= max_pages)
+            or (max_resources is not None and registered >= max_resources)
+            or (
+                max_duration_ms is not None
+                and (time.monotonic() - started_at) * 1000 >= max_duration_ms
+            )
+            or tasks.deadline_reached()
+        ):
+            tasks.call(continuation(cursor))
+            return
+
+
+def paginated_loader(
+    max_pages: typing.Optional[int] = None,
+    max_resources: typing.Optional[int] = None,
+    max_duration_ms: typing.Optional[int] = None,
+) -> typing.Callable[[PageFunc], PageFunc]:
+    """
+    Register a page fetching function as a resource loader.
+
+    For example:
+    ```
+    @resources.paginated_loader(max_resources=1000)
+    def load_users(p: Provider, cursor: typing.Optional[str]) -> resources.Page:
+        res = p.client.list_users(cursor=cursor)
+        return resources.Page(
+            resources=[User(id=u.id, name=u.name) for u in res.users],
+            cursor=res.next_cursor,
+        )
+    ```
+
+    The loader fetches pages while the limits allow, as described in `paginate()`.
+    The remaining pages are fetched by a task named `<function name>_next_page`,
+    which is registered along with the loader.
+    """
+
+    def actual_decorator(func: PageFunc) -> PageFunc:
+        def fetch(p, cursor: typing.Optional[str]):
+            paginate(
+                p,
+                func,
+                continuation=lambda cursor: NextPage(cursor=cursor),
+                cursor=cursor,
+                max_pages=max_pages,
+                max_resources=max_resources,
+                max_duration_ms=max_duration_ms,
+            )
+
+        def body(ns: dict):
+            ns["__annotations__"] = {"cursor": str}
+            ns["__module__"] = func.__module__
+            ns["run"] = lambda self, p: fetch(p, self.cursor)
+
+        NextPage = types.new_class(
+            f"{func.__name__}_next_page", (tasks.Task,), exec_body=body
+        )
+
+        def load(p):
+            fetch(p, None)
+
+        load.__name__ = func.__name__
+        namespace.register_resource_loader(load)
+        return func
+
+    return actual_decorator
+
+
 def export_schema() -> v1alpha1.Resources:
     """
     Returns the schema for the 'resources' section in a provider schema as a dict.
     This section defines the resources the provider can read, along with the
     fetching methods which can be called to fetch them.
+
+    The schema is cached until the namespace changes, so the returned
+    model is shared between calls and must not be modified.
     """
+    global _SCHEMA
+    generation = namespace.get_generation()
+    if _SCHEMA is not None and _SCHEMA[0] == generation:
+        return _SCHEMA[1]
+
     loaders: typing.Dict[str, v1alpha1.Loader] = {}
     for k in namespace.get_resource_loaders().keys():
         loaders[k] = v1alpha1.Loader(title=k)
 
     resources = v1alpha1.Resources(loaders=loaders, types={})
     for Klass in namespace.get_resource_classes():
-        properties = {}
-        all_vars = [(k, v) for (k, v) in vars(Klass).items() if not k.startswith("__")]
-        for k, v in all_vars:
-            properties[k] = {"type": "string"}
         resources.types[Klass.__name__] = Klass.schema()
 
+    _SCHEMA = (generation, resources)
     return resources
 
 
+_SCHEMA: typing.Optional[typing.Tuple[int, v1alpha1.Resources]] = None
+"""the result of export_schema(), along with the namespace generation it was exported at"""
+
+
 def register(resource: BaseResource):
+    """
+    Registers a resource which has been found by a loader or task.
+
+    This is safe to call from concurrently running tasks and coroutines.
+    """
     namespace._ALL_RESOURCES.append(resource)
 
 
+_MISSING = object()
+
+
+class _RowBuffer:
+    """
+    A compact buffer of rows for a single resource class, registered
+    with `register_many()`.
+
+    Rows are stored as tuples in the order of the class's fields,
+    and are exported directly to the format produced by `export_json()`
+    without creating a model instance for each row.
+    """
+
+    __slots__ = (
+        "resource_class",
+        "type_name",
+        "named",
+        "plain",
+        "fields",
+        "field_names",
+        "rows",
+    )
+
+    def __init__(self, resource_class: typing.Type[BaseResource]) -> None:
+        self.resource_class = resource_class
+        self.type_name = resource_class.__name__
+        self.named = issubclass(resource_class, Resource)
+        self.plain = _has_plain_fields(resource_class)
+        self.fields = [
+            f for k, f in resource_class.__fields__.items() if k not in ("id", "name")
+        ]
+        self.field_names = tuple(f.name for f in self.fields)
+        self.rows: typing.List[tuple] = []
+
+    def to_row(self, values: typing.Mapping[str, typing.Any]) -> tuple:
+        row = [values["id"]]
+        if self.named:
+            row.append(values["name"])
+
+        for f in self.fields:
+            val = values.get(f.name, _MISSING)
+            if val is _MISSING:
+                if f.required:
+                    raise KeyError(
+                        f"{self.type_name} row {values['id']} is missing required field {f.name}"
+                    )
+                val = f.get_default()
+            row.append(val)
+
+        return tuple(row)
+
+    def to_resource(self, row: tuple) -> BaseResource:
+        """
+        Returns the row as an instance of the resource class. The row is
+        not validated, as the rows passed to `register_many()` are trusted.
+        """
+        keys = (
+            ("id", "name") + self.field_names
+            if self.named
+            else ("id",) + self.field_names
+        )
+        return self.resource_class.construct(**dict(zip(keys, row)))
+
+    def export_json(self, row: tuple) -> dict:
+        if self.named:
+            data = dict(zip(self.field_names, row[2:]))
+        else:
+            data = dict(zip(self.field_names, row[1:]))
+
+        if not self.plain:
+            data = _to_plain(data)
+
+        if self.named:
+            return {"type": self.type_name, "id": row[0], "name": row[1], "data": data}
+        return {"type": self.type_name, "id": row[0], "data": data}
+
+
+def register_many(
+    resource_class: typing.Type[BaseResource],
+    rows: typing.Iterable[typing.Mapping[str, typing.Any]],
+):
+    """
+    Registers many resources of the same type at once.
+
+    Each row is a mapping of field names to values, such as a dict. The rows
+    must be trusted, as they are not validated against the resource class.
+    Fields which are not provided in a row use the default value for the field.
+
+    This is significantly faster than calling `register()` for each resource,
+    so it should be used by loaders which register large numbers of resources.
+
+    For example:
+    ```
+    resources.register_many(
+        User,
+        ({"id": u["id"], "name": u["name"], "email": u["email"]} for u in users),
+    )
+    ```
+    """
+    buffer = namespace._RESOURCE_BUFFERS.get(resource_class)
+    if buffer is None:
+        buffer = namespace._RESOURCE_BUFFERS.setdefault(
+            resource_class, _RowBuffer(resource_class)
+        )
+
+    to_row = buffer.to_row
+    buffer.rows.extend([to_row(r) for r in rows])
+
+
+class _Collected:
+    """
+    The resources registered while running a task, including resources in the
+    compact buffers created by `register_many()`.
+    """
+
+    def __init__(
+        self,
+        resources: typing.List[BaseResource],
+        buffers: typing.Iterable[_RowBuffer],
+    ) -> None:
+        self.resources = resources
+        self.buffers = list(buffers)
+        self._index: typing.Optional[typing.Set[typing.Tuple[str, str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.resources) + sum(len(b.rows) for b in self.buffers)
+
+    def keys(self) -> typing.Iterator[typing.Tuple[str, str]]:
+        """
+        Returns the type and ID of each resource.
+        """
+        for r in self.resources:
+            yield r.__class__.__name__, r.id
+        for b in self.buffers:
+            for row in b.rows:
+                yield b.type_name, row[0]
+
+    def index(self) -> typing.Set[typing.Tuple[str, str]]:
+        """
+        Returns the type and ID of each resource as a set, which is built on
+        first use and reused if the resources are split across responses.
+        """
+        if self._index is None:
+            self._index = set(self.keys())
+        return self._index
+
+    def export(self, offset: int = 0) -> typing.Iterator[dict]:
+        """
+        Exports the resources in the `export_json()` format,
+        skipping the first `offset` resources.
+        """
+        for r in self.resources[offset:]:
+            yield r.export_json()
+        offset = max(offset - len(self.resources), 0)
+
+        for b in self.buffers:
+            if offset >= len(b.rows):
+                offset -= len(b.rows)
+                continue
+            export_json = b.export_json
+            for row in b.rows[offset:]:
+                yield export_json(row)
+            offset = 0
+
+
+def _collect() -> _Collected:
+    return _Collected(
+        resources=namespace._ALL_RESOURCES,
+        buffers=namespace._RESOURCE_BUFFERS.values(),
+    )
+
+
+def _relations() -> typing.Dict[str, typing.Tuple[typing.Tuple[str, str], ...]]:
+    """
+    Returns the fields declared with `Related()` on each resource class,
+    by resource type, as (field name, related resource type) pairs.
+    """
+    relations = {}
+    for Klass in namespace.get_resource_classes():
+        fields = tuple(
+            (name, f.field_info.extra["relation"])
+            for name, f in Klass.__fields__.items()
+            if "relation" in f.field_info.extra
+        )
+        if len(fields) > 0:
+            relations[Klass.__name__] = fields
+    return relations
+
+
+def _edges(
+    exported: typing.Iterable[dict],
+    relations: typing.Dict[str, typing.Tuple[typing.Tuple[str, str], ...]],
+    index: typing.Set[typing.Tuple[str, str]],
+) -> typing.List[dict]:
+    """
+    Returns an edge for each reference from an exported resource to a related
+    resource, marking whether the related resource is in `index`.
+
+    A related field may hold a single ID or a list of IDs.
+    """
+    edges = []
+    for r in exported:
+        fields = relations.get(r["type"])
+        if fields is None:
+            continue
+
+        data = r["data"]
+        for name, to_type in fields:
+            val = data.get(name)
+            if val is None:
+                continue
+
+            ids = val if isinstance(val, (list, tuple)) else (val,)
+            for to_id in ids:
+                edges.append(
+                    {
+                        "from": {"type": r["type"], "id": r["id"]},
+                        "field": name,
+                        "to": {"type": to_type, "id": to_id},
+                        "resolved": (to_type, to_id) in index,
+                    }
+                )
+    return edges
+
+
+def _count() -> int:
+    return len(namespace._ALL_RESOURCES) + sum(
+        len(b.rows) for b in namespace._RESOURCE_BUFFERS.values()
+    )
+
+
 def get() -> typing.List[BaseResource]:
-    return namespace._ALL_RESOURCES
+    """
+    Returns the registered resources, including the rows registered with
+    `register_many()`, which are converted to resource instances.
+    """
+    buffered = [
+        b.to_resource(row)
+        for b in namespace._RESOURCE_BUFFERS.values()
+        for row in b.rows
+    ]
+    if len(buffered) == 0:
+        return namespace._ALL_RESOURCES
+    return namespace._ALL_RESOURCES + buffered
 
 
 def _reset():
     namespace._ALL_RESOURCES = []
+    namespace._RESOURCE_BUFFERS = {}
 
 
 def without_keys(d, keys):
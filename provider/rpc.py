@@ -1,6 +1,6 @@
 import typing
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 
 class AccessRequest(BaseModel):
@@ -34,21 +34,143 @@ class Describe(BaseModel):
 
 class Load(BaseModel):
     class Data(BaseModel):
+        class Drain(BaseModel):
+            """
+            If provided, pending tasks are executed in-process until
+            there are none left or one of the limits is reached.
+            """
+
+            max_duration_ms: typing.Optional[int] = None
+            """stop starting new tasks once this much time has elapsed since the event was received"""
+            max_resources: typing.Optional[int] = None
+            """stop starting new tasks once this many resources have been registered"""
+
         task: str
         """the resource loader function ID to run"""
         ctx: typing.Optional[dict] = {}
         """context information for the task"""
+        drain: typing.Optional[Drain] = None
+        """opt-in to executing pending tasks in-process"""
+        max_response_bytes: typing.Optional[int] = None
+        """
+        If provided, resources are split across multiple responses so that
+        the serialized resources and tasks in each response stay under this size.
+        """
+        cursor: typing.Optional[str] = None
+        """the cursor returned in a previous LoadResponse, to fetch the next chunk of resources"""
+        fingerprints: typing.Optional[typing.Dict[str, typing.Dict[str, str]]] = None
+        """
+        If provided, only new and changed resources are returned. This is a map of
+        resource type to resource ID to the 'hash' of each resource previously
+        returned by the task. Resources in this map which the task no longer finds
+        are returned in LoadResponse.removed.
+        """
+        edges: bool = False
+        """
+        If True, the references between resources declared with `resources.Related()`
+        are returned in LoadResponse.edges.
+        """
 
     type: typing.Literal["load"]
     data: Data
 
 
+class Batch(BaseModel):
+    class Data(BaseModel):
+        items: typing.List[typing.Any]
+        """
+        the grant and revoke events to execute. Items are parsed one at a time
+        with `parse_batch_item()`, so that an invalid item only fails itself.
+        """
+
+    type: typing.Literal["batch"]
+    data: Data
+
+
 class Event(BaseModel):
-    __root__: typing.Union[Grant, Revoke, Load, Describe] = Field(
+    __root__: typing.Union[Grant, Revoke, Load, Describe, Batch] = Field(
         ..., discriminator="type"
     )
 
 
+EventType = typing.Union[Grant, Revoke, Load, Describe, Batch]
+
+
+class BatchItem(BaseModel):
+    __root__: typing.Union[Grant, Revoke] = Field(..., discriminator="type")
+
+
+_PASSTHROUGH_FIELDS: typing.Dict[str, str] = {
+    "grant": "state",
+    "revoke": "state",
+    "load": "ctx",
+}
+"""
+Fields in the event data which are arbitrary dicts, defined by the provider.
+These are passed through to the provider without being validated or copied.
+"""
+
+_EVENT_TYPES: typing.Dict[str, typing.Type[BaseModel]] = {
+    "grant": Grant,
+    "revoke": Revoke,
+    "load": Load,
+    "describe": Describe,
+    "batch": Batch,
+}
+
+
+def parse_event(event: typing.Any) -> EventType:
+    """
+    Parses an event, equivalent to `Event.parse_obj(event).__root__`.
+
+    The event model is looked up using the 'type' field of the event, and
+    provider-defined dicts like the grant 'state' and the load 'ctx' are passed
+    through without being validated.
+
+    If the event is invalid, it is parsed with `Event.parse_obj()` so that
+    the validation error is the same as if the fast path wasn't used.
+    """
+    if isinstance(event, dict):
+        Model = _EVENT_TYPES.get(event.get("type"))
+        if Model is not None:
+            try:
+                return _parse(Model, event)
+            except ValidationError:
+                pass
+
+    return Event.parse_obj(event).__root__
+
+
+def parse_batch_item(item: typing.Any) -> typing.Union[Grant, Revoke]:
+    """
+    Parses a grant or revoke item in a batch event, in the same way as `parse_event()`.
+    """
+    if isinstance(item, dict) and item.get("type") in ("grant", "revoke"):
+        try:
+            return _parse(_EVENT_TYPES[item["type"]], item)
+        except ValidationError:
+            pass
+
+    return BatchItem.parse_obj(item).__root__
+
+
+def _parse(Model: typing.Type[BaseModel], event: dict) -> EventType:
+    field = _PASSTHROUGH_FIELDS.get(event["type"])
+    data = event.get("data")
+
+    if field is None or not isinstance(data, dict):
+        return Model.parse_obj(event)
+
+    value = data.get(field)
+    if not isinstance(value, dict):
+        return Model.parse_obj(event)
+
+    # validate the event without the provider-defined field, and add it back afterwards
+    parsed = Model.parse_obj({**event, "data": {**data, field: None}})
+    setattr(parsed.data, field, value)
+    return parsed
+
+
 class DescribeResponse(BaseModel):
     provider: dict
     config: dict
@@ -58,8 +180,29 @@ class DescribeResponse(BaseModel):
 
 
 class LoadResponse(BaseModel):
+    """
+    The optional fields are only included in the serialized response if they are set.
+    """
+
     resources: typing.List[dict]
     tasks: typing.List[dict]
+    cursor: typing.Optional[str] = None
+    """
+    Set if there are more resources to fetch. To fetch them, send the
+    same load event again with the cursor included. The cursor can only be
+    used shortly afterwards, and expires if it is sent to another container.
+    """
+    removed: typing.Optional[typing.Dict[str, typing.List[str]]] = None
+    """
+    If fingerprints were provided in the load event, the IDs of the
+    resources which were not found, by resource type.
+    """
+    edges: typing.Optional[typing.List[dict]] = None
+    """
+    If edges were requested in the load event, the references from the
+    returned resources to related resources. An edge is 'resolved' if the
+    related resource was found by the same load event.
+    """
 
 
 class GrantResponse(BaseModel):
@@ -67,5 +210,22 @@ class GrantResponse(BaseModel):
     state: typing.Optional[dict] = None
 
 
+class BatchResponse(BaseModel):
+    class ItemResult(BaseModel):
+        response: typing.Optional[GrantResponse] = None
+        """the response for a grant item. Revoke items have no response."""
+        error: typing.Optional[str] = None
+        """set if the item failed"""
+
+    results: typing.List[ItemResult]
+    """the result of each item, in the same order as the items in the batch"""
+
+
 class Result(BaseModel):
-    response: typing.Union[DescribeResponse, LoadResponse, GrantResponse]
+    # GrantResponse must be last, as all of its fields are optional
+    response: typing.Union[DescribeResponse, LoadResponse, BatchResponse, GrantResponse]
+    metadata: typing.Optional[dict] = None
+    """
+    Information about how the event was handled, such as the time spent
+    in each phase. Only set if the runtime is configured to include it.
+    """
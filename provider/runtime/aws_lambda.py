@@ -1,7 +1,16 @@
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import base64
+import json
+import threading
+import time
 import typing
+import uuid
 import provider
+from provider.runtime import idempotency, metrics, serialize
 from provider import (
+    namespace,
     resources,
     tasks,
     schema,
@@ -18,39 +27,122 @@ class AWSLambdaRuntime:
     version: typing.Optional[str] = None
     publisher: typing.Optional[str] = None
     schema_version: typing.Optional[str] = None
+    batch_max_workers: int = 10
+    """the maximum number of items in a batch event which are executed concurrently"""
+    load_max_workers: int = 10
+    """the maximum number of tasks which are executed concurrently when draining a load event"""
+    metrics_namespace: typing.Optional[str] = None
+    """
+    If set, the time spent in each phase of handling an event is written to stdout
+    as a CloudWatch Embedded Metric Format log line, using this metric namespace.
+    """
+    include_timings: bool = False
+    """if True, the time spent in each phase is included in the result metadata"""
+    load_budget_ms: typing.Optional[int] = None
+    """
+    If set, the maximum time a load event may spend starting new work.
+    The load event also stops starting new work if the Lambda invocation
+    is about to time out, whichever is sooner.
+    """
+    deadline_margin_ms: int = 1000
+    """
+    the time reserved before a Lambda invocation times out for work which is
+    already running to finish, and for the response to be returned
+    """
+    idempotency_store: typing.Optional[idempotency.Store] = None
+    """
+    If set, the results of grant and revoke events which include an access request ID
+    are stored, and a retried event returns the stored result instead of calling
+    the grant or revoke function again.
+    """
+
+    _schema_cache: typing.Optional[typing.Tuple[int, dict]] = field(
+        default=None, init=False, repr=False
+    )
+    """
+    The exported provider schema, along with the namespace generation it was exported at.
+    The schema only changes if the registered classes and functions change, so it is
+    cached between Describe events in a warm container.
+    """
+
+    _load_cache: typing.OrderedDict[str, resources._Collected] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    """
+    The resources found by recent load events which were split into multiple responses,
+    keyed by the token in the cursor. The next chunk of resources is served from the
+    cache, so a cursor can only be used with the container which returned it.
+    """
+
+    _load_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+    """
+    Resources and tasks are collected in module-level state while a load event
+    is running, so load events are handled one at a time.
+    """
 
     def handle(self, event, context):
-        result = self._do_handle(event=event, context=context)
-        if result is not None:
-            return result.dict(by_alias=True)
+        return self._handle(event=event, context=context, encode=lambda obj: obj)
 
-    def _do_handle(self, event, context) -> typing.Optional[rpc.Result]:
-        parsed = rpc.Event.parse_obj(event)
-        event = parsed.__root__
+    def handle_json(self, event, context) -> bytes:
+        """
+        Handles an event and returns the result encoded as JSON.
+        """
+        return self._handle(event=event, context=context, encode=serialize.dumps)
 
-        if isinstance(event, rpc.Grant):
-            grant_result = access.call_access_func(
-                type="grant",
-                p=self.provider,
-                data=event.data,
-            )
+    def _handle(
+        self, event, context, encode: typing.Callable[[typing.Any], typing.Any]
+    ):
+        """
+        Handles an event, timing each phase. The result is converted
+        to a dict, which is then passed to `encode`.
+        """
+        timings = metrics.Timings()
+        try:
+            result = self._do_handle(event=event, context=context, timings=timings)
 
-            if grant_result is None:
-                return rpc.Result(response=rpc.GrantResponse())  # empty response
+            with timings.span("serialize"):
+                exported = None
+                if result is not None:
+                    if self.include_timings:
+                        # the metadata can't include the time taken to serialize itself
+                        result.metadata = timings.export()
+                    exported = serialize.to_dict(result)
+                return encode(exported)
 
-            response = rpc.GrantResponse(
-                access_instructions=grant_result.access_instructions,
-                state=grant_result.state,
-            )
+        except Exception:
+            timings.count("errors")
+            raise
+
+        finally:
+            if self.metrics_namespace is not None:
+                timings.write(namespace=self.metrics_namespace)
 
+    def _do_handle(
+        self, event, context, timings: typing.Optional[metrics.Timings] = None
+    ) -> typing.Optional[rpc.Result]:
+        if timings is None:
+            timings = metrics.Timings()
+
+        with timings.span("parse"):
+            event = rpc.parse_event(event)
+        timings.event_type = event.type
+
+        if isinstance(event, rpc.Grant):
+            with timings.span("access"):
+                response = self._grant(event.data)
             return rpc.Result(response=response)
 
         elif isinstance(event, rpc.Revoke):
-            return access.call_access_func(
-                type="revoke",
-                p=self.provider,
-                data=event.data,
-            )
+            with timings.span("access"):
+                return self._revoke(event.data)
+
+        elif isinstance(event, rpc.Batch):
+            timings.count("items", len(event.data.items))
+            with timings.span("access"):
+                response = self._batch(event.data)
+            return rpc.Result(response=response)
 
         if isinstance(event, rpc.Describe):
             # Describe returns the configuration of the provider including the current status.
@@ -63,17 +155,8 @@ class AWSLambdaRuntime:
             diagnostics = self.provider.diagnostics.export_logs()
             healthy = self.provider.diagnostics.has_no_errors()
 
-            id = None
-            if self.name is not None:
-                id = v1alpha1.ID(
-                    name=self.name,
-                    publisher=self.publisher,
-                    schema_version=self.schema_version,
-                )
-
-            provider_schema = schema.export_schema(id=id).dict(
-                exclude_none=True, by_alias=True
-            )
+            with timings.span("schema"):
+                provider_schema = self._export_schema()
 
             response = rpc.DescribeResponse(
                 config=config,
@@ -86,21 +169,397 @@ class AWSLambdaRuntime:
             return rpc.Result(response=response)
 
         elif isinstance(event, rpc.Load):
+            with self._load_lock:
+                response = self._load(data=event.data, timings=timings, context=context)
+
+            # the response was built by the runtime, so it doesn't need validating
+            return rpc.Result.construct(response=response)
+
+        else:
+            raise Exception(f"unhandled event type")
+
+    def _grant(self, data: rpc.GrantData) -> rpc.GrantResponse:
+        key, stored = self._get_stored_result(type="grant", data=data)
+        if stored is not None:
+            return rpc.GrantResponse(**stored)
+
+        grant_result = access.call_access_func(
+            type="grant",
+            p=self.provider,
+            data=data,
+        )
+
+        if grant_result is None:
+            response = rpc.GrantResponse()  # empty response
+        else:
+            response = rpc.GrantResponse(
+                access_instructions=grant_result.access_instructions,
+                state=grant_result.state,
+            )
+
+        self._store_result(key=key, result=response.dict())
+        # a later revoke of the same access must call the revoke function again
+        self._clear_stored_result(type="revoke", data=data)
+        return response
+
+    def _revoke(self, data: rpc.GrantData):
+        key, stored = self._get_stored_result(type="revoke", data=data)
+        if stored is not None:
+            return None
+
+        result = access.call_access_func(
+            type="revoke",
+            p=self.provider,
+            data=data,
+        )
+
+        # revokes have no response, so an empty result is stored
+        self._store_result(key=key, result={})
+        # a later grant of the same access must call the grant function again
+        self._clear_stored_result(type="grant", data=data)
+        return result
+
+    def _get_stored_result(
+        self,
+        type: typing.Union[typing.Literal["grant"], typing.Literal["revoke"]],
+        data: rpc.GrantData,
+    ) -> typing.Tuple[typing.Optional[str], typing.Optional[dict]]:
+        """
+        Returns the idempotency key for a grant or revoke event, and the
+        stored result for the event if it has already been handled.
+
+        If the stored result can't be read, the event is handled as if
+        there was no stored result.
+        """
+        if self.idempotency_store is None:
+            return None, None
+
+        key = idempotency.key(type=type, data=data)
+        if key is None:
+            return None, None
+
+        try:
+            return key, self.idempotency_store.get(key)
+        except Exception as e:
+            self.provider.diagnostics.info(f"reading idempotency result failed: {e}")
+            return key, None
+
+    def _store_result(self, key: typing.Optional[str], result: dict):
+        if self.idempotency_store is None or key is None:
+            return
+
+        try:
+            self.idempotency_store.put(key, result)
+        except Exception as e:
+            # the grant or revoke has already succeeded, so it isn't failed
+            # if the result can't be stored.
+            self.provider.diagnostics.info(f"storing idempotency result failed: {e}")
+
+    def _clear_stored_result(
+        self,
+        type: typing.Union[typing.Literal["grant"], typing.Literal["revoke"]],
+        data: rpc.GrantData,
+    ):
+        """
+        Removes the stored result for a grant or revoke event, if there is one.
+        """
+        if self.idempotency_store is None:
+            return
+
+        key = idempotency.key(type=type, data=data)
+        if key is None:
+            return
+
+        try:
+            self.idempotency_store.delete(key)
+        except Exception as e:
+            self.provider.diagnostics.info(f"removing idempotency result failed: {e}")
+
+    def _batch(self, data: rpc.Batch.Data) -> rpc.BatchResponse:
+        """
+        Executes the grant and revoke items in a batch concurrently.
+        An item failing doesn't cause the rest of the batch to fail,
+        instead the error is returned in the result for the item.
+        """
+
+        def execute(raw_item: typing.Any) -> rpc.BatchResponse.ItemResult:
+            try:
+                item = rpc.parse_batch_item(raw_item)
+                if isinstance(item, rpc.Grant):
+                    response = self._grant(item.data)
+                    return rpc.BatchResponse.ItemResult(response=response)
+
+                self._revoke(item.data)
+                return rpc.BatchResponse.ItemResult()
+
+            except Exception as e:
+                return rpc.BatchResponse.ItemResult(error=str(e))
+
+        if len(data.items) == 0:
+            return rpc.BatchResponse(results=[])
+
+        max_workers = min(self.batch_max_workers, len(data.items))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map returns the results in the same order as the items
+            results = list(executor.map(execute, data.items))
+
+        return rpc.BatchResponse(results=results)
+
+    def _load(
+        self, data: rpc.Load.Data, timings: metrics.Timings, context=None
+    ) -> rpc.LoadResponse:
+        token = None
+        offset = 0
+        found = None
+        pending_tasks = []
+
+        if data.cursor is not None:
+            token, offset = _decode_cursor(data.cursor)
+            found = self._load_cache.get(token)
+
+            # running the task again isn't guaranteed to register the same
+            # resources in the same order, so the resources before the offset
+            # can't be skipped reliably.
+            if found is None:
+                raise CursorExpiredError(
+                    f"load cursor {data.cursor} has expired or was returned by another container, restart the load without a cursor"
+                )
+
+        else:
             resources._reset()
             tasks._reset()
-            tasks._execute(
-                provider=self.provider, task=event.data.task, ctx=event.data.ctx
+            tasks._set_deadline(
+                self._deadline(context=context, started_at=timings.started_at)
             )
-            # find the resources and pending tasks, and return them
-            found = resources.get()
+            try:
+                with timings.span("tasks"):
+                    tasks._execute(provider=self.provider, task=data.task, ctx=data.ctx)
+
+                    if data.drain is not None:
+                        self._drain(drain=data.drain, started_at=timings.started_at)
+            finally:
+                tasks._set_deadline(None)
+
+            # find the resources and pending tasks
+            with timings.span("collect"):
+                found = resources._collect()
+
+            # pending tasks are only returned in the first response,
+            # if the resources are split across multiple responses.
             pending_tasks = tasks.get()
 
-            response = rpc.LoadResponse(
-                resources=[r.export_json() for r in found],
-                tasks=[t.json() for t in pending_tasks],
+        exported_tasks = [t.json() for t in pending_tasks]
+
+        fingerprints = data.fingerprints
+
+        def changed(exported: dict) -> bool:
+            """
+            Adds the content hash to an exported resource, and returns
+            whether the resource is new or has changed since the caller
+            last saw it.
+            """
+            if fingerprints is None:
+                return True
+            exported["hash"] = resources.fingerprint(exported)
+            known = fingerprints.get(exported["type"], {})
+            return known.get(exported["id"]) != exported["hash"]
+
+        relations = None
+        edges = None
+        if data.edges:
+            relations = resources._relations()
+            edges = []
+
+        # export resources until the response size limit is reached.
+        # The edges from each resource count towards the limit.
+        max_bytes = data.max_response_bytes
+        with timings.span("export"):
+            size = _serialized_size(exported_tasks)
+            exported_resources = []
+            next_offset = offset
+            for exported in found.export(offset):
+                if changed(exported):
+                    resource_edges = None
+                    if relations is not None:
+                        resource_edges = resources._edges(
+                            [exported], relations=relations, index=found.index()
+                        )
+
+                    if max_bytes is not None:
+                        size += _serialized_size(exported)
+                        if resource_edges:
+                            size += _serialized_size(resource_edges) - 1
+
+                        # always include at least one resource, so that the caller makes progress
+                        if size > max_bytes and len(exported_resources) > 0:
+                            break
+
+                    exported_resources.append(exported)
+                    if resource_edges:
+                        edges.extend(resource_edges)
+                next_offset += 1
+
+        timings.count("resources", len(exported_resources))
+        timings.count("tasks", len(exported_tasks))
+        if edges is not None:
+            timings.count(
+                "unresolved_references", sum(1 for e in edges if not e["resolved"])
             )
 
-            return rpc.Result(response=response)
+        more = next_offset < len(found)
 
-        else:
-            raise Exception(f"unhandled event type")
+        removed = None
+        if fingerprints is not None and not more:
+            # removed resources are returned with the final response
+            removed = _removed(fingerprints=fingerprints, found=found)
+
+            # if they don't fit, they are returned in a response of their own
+            if (
+                max_bytes is not None
+                and size + _serialized_size(removed) > max_bytes
+                and len(exported_resources) + len(exported_tasks) > 0
+            ):
+                removed = None
+                more = True
+
+        cursor = None
+        if more:
+            if token is None:
+                token = uuid.uuid4().hex
+            self._load_cache[token] = found
+            self._load_cache.move_to_end(token)
+            while len(self._load_cache) > _LOAD_CACHE_SIZE:
+                self._load_cache.popitem(last=False)
+
+            cursor = _encode_cursor(token, next_offset)
+        elif token is not None:
+            self._load_cache.pop(token, None)
+
+        # the resources and tasks are already exported as dicts,
+        # so construct() is used to avoid pydantic copying them.
+        return rpc.LoadResponse.construct(
+            resources=exported_resources,
+            tasks=exported_tasks,
+            cursor=cursor,
+            removed=removed,
+            edges=edges,
+        )
+
+    def _deadline(self, context, started_at: float) -> typing.Optional[float]:
+        """
+        Returns the time.monotonic() value by which a load event should stop
+        starting new work, based on the remaining time of the Lambda invocation
+        and the configured budget. Returns None if neither are available.
+        """
+        deadlines = []
+
+        get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining_time is not None:
+            remaining_ms = get_remaining_time() - self.deadline_margin_ms
+            deadlines.append(time.monotonic() + remaining_ms / 1000)
+
+        if self.load_budget_ms is not None:
+            deadlines.append(started_at + self.load_budget_ms / 1000)
+
+        if len(deadlines) == 0:
+            return None
+        return min(deadlines)
+
+    def _drain(self, drain: rpc.Load.Data.Drain, started_at: float):
+        """
+        Executes the pending tasks from a load event in-process,
+        until the limits specified in the event are reached.
+        """
+
+        def should_continue() -> bool:
+            if drain.max_duration_ms is not None:
+                elapsed_ms = (time.monotonic() - started_at) * 1000
+                if elapsed_ms >= drain.max_duration_ms:
+                    return False
+
+            if drain.max_resources is not None:
+                if resources._count() >= drain.max_resources:
+                    return False
+
+            return True
+
+        tasks._drain(
+            provider=self.provider,
+            should_continue=should_continue,
+            max_workers=self.load_max_workers,
+        )
+
+    def _export_schema(self) -> dict:
+        """
+        Returns the provider schema, serving it from the cache if
+        the namespace has not changed since it was last exported.
+        """
+        generation = namespace.get_generation()
+        if self._schema_cache is not None and self._schema_cache[0] == generation:
+            return self._schema_cache[1]
+
+        id = None
+        if self.name is not None:
+            id = v1alpha1.ID(
+                name=self.name,
+                publisher=self.publisher,
+                schema_version=self.schema_version,
+            )
+
+        provider_schema = schema.export_schema(id=id).dict(
+            exclude_none=True, by_alias=True
+        )
+        self._schema_cache = (generation, provider_schema)
+        return provider_schema
+
+
+class CursorExpiredError(Exception):
+    """
+    Raised if the resources for a load cursor are no longer cached,
+    or were cached by a different container.
+    """
+
+
+_LOAD_CACHE_SIZE = 4
+"""the maximum number of load events to retain resources for in AWSLambdaRuntime._load_cache"""
+
+
+def _removed(
+    fingerprints: typing.Dict[str, typing.Dict[str, str]],
+    found: resources._Collected,
+) -> typing.Dict[str, typing.List[str]]:
+    """
+    Returns the IDs of the resources in `fingerprints` which weren't found, by type.
+    """
+    found_ids: typing.Dict[str, typing.Set[str]] = {}
+    for type, id in found.keys():
+        found_ids.setdefault(type, set()).add(id)
+
+    removed = {}
+    for type, known in fingerprints.items():
+        ids = found_ids.get(type, set())
+        missing = [id for id in known.keys() if id not in ids]
+        if len(missing) > 0:
+            removed[type] = missing
+    return removed
+
+
+def _serialized_size(obj: typing.Any) -> int:
+    # add one byte to account for the separator between items in a list
+    return len(json.dumps(obj)) + 1
+
+
+def _encode_cursor(token: str, offset: int) -> str:
+    raw = json.dumps({"token": token, "offset": offset})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> typing.Tuple[str, int]:
+    """
+    Decodes a load cursor into the token and the offset of the next resource to return.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return raw["token"], int(raw["offset"])
+    except Exception as e:
+        raise ValueError(f"invalid load cursor {cursor}: {e}")
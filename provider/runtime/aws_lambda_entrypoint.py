@@ -1,12 +1,26 @@
+import time
 import os
-from provider import config
-from provider.runtime import AWSLambdaRuntime
+import typing
+from provider import config, _import_started_at
+from provider.runtime import AWSLambdaRuntime, idempotency
 from provider.runtime.initialise import initialise_provider
 import importlib.resources
 import json
 import importlib
 import pkgutil
 
+import_times: typing.Dict[str, float] = {
+    "provider": (time.perf_counter() - _import_started_at) * 1000
+}
+"""
+The time taken to import each module during the cold start, in milliseconds.
+
+Times are cumulative, so a package includes the time taken to import
+anything it imports at module load. The time for `provider` is measured
+from the start of `provider/__init__.py`, so it includes the PDK's
+dependencies such as pydantic, and every PDK module the entrypoint loads.
+"""
+
 
 def import_submodules(package, recursive=True):
     """Import all submodules of a module, recursively, including subpackages
@@ -16,16 +30,38 @@ def import_submodules(package, recursive=True):
     :rtype: dict[str, types.ModuleType]
     """
     if isinstance(package, str):
-        package = importlib.import_module(package)
+        package = _timed_import(package)
     results = {}
     for loader, name, is_pkg in pkgutil.walk_packages(package.__path__):
         full_name = package.__name__ + "." + name
-        results[full_name] = importlib.import_module(full_name)
+        results[full_name] = _timed_import(full_name)
         if recursive and is_pkg:
             results.update(import_submodules(full_name))
     return results
 
 
+def _timed_import(name: str):
+    """
+    Imports a module, recording the time taken in `import_times`.
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times.setdefault(name, (time.perf_counter() - start) * 1000)
+    return module
+
+
+def report_import_times(p) -> None:
+    """
+    Writes the import time breakdown to the provider diagnostics, if the
+    `PROVIDER_IMPORT_TIME_REPORT` environment variable is set to 'true'.
+    """
+    if os.getenv("PROVIDER_IMPORT_TIME_REPORT", "").lower() != "true":
+        return
+
+    for name, ms in import_times.items():
+        p.diagnostics.info(f"import {name} took {ms:.2f}ms")
+
+
 # this package is generated by the PDK packaging process,
 # and will exist in the AWS Lambda deployment zip file.
 try:
@@ -54,7 +90,7 @@ with importlib.resources.open_text("commonfate_provider_dist", "manifest.json")
 provider_python_package = load_metadata_value(provider_data, "python_package")
 
 try:
-    importlib.import_module(provider_python_package)
+    _timed_import(provider_python_package)
 
     import_submodules(provider_python_package)
 except ImportError as e:
@@ -65,14 +101,31 @@ except ImportError as e:
 
 provider = initialise_provider(configurer=config.AWS_LAMBDA_LOADER)
 
+report_import_times(provider)
+
 runtime = AWSLambdaRuntime(
     provider=provider,
     name=load_metadata_value(provider_data, "name"),
     version=load_metadata_value(provider_data, "version"),
     publisher=load_metadata_value(provider_data, "publisher"),
     schema_version=load_metadata_value(provider_data, "schema_version"),
+    # if set, phase timings are written to the function logs as CloudWatch metrics
+    metrics_namespace=os.getenv("PROVIDER_METRICS_NAMESPACE") or None,
+    include_timings=os.getenv("PROVIDER_INCLUDE_TIMINGS", "").lower() == "true",
 )
 
+# retried grant and revoke events are only deduplicated if a store is configured,
+# either a DynamoDB table shared by every container or memory in each warm container.
+if os.getenv("PROVIDER_IDEMPOTENCY_TABLE"):
+    runtime.idempotency_store = idempotency.DynamoDBStore(
+        table_name=os.environ["PROVIDER_IDEMPOTENCY_TABLE"], ttl_seconds=86400
+    )
+elif os.getenv("PROVIDER_IDEMPOTENCY_STORE", "").lower() == "memory":
+    runtime.idempotency_store = idempotency.MemoryStore()
+
+if os.getenv("PROVIDER_LOAD_BUDGET_MS"):
+    runtime.load_budget_ms = int(os.environ["PROVIDER_LOAD_BUDGET_MS"])
+
 
 def lambda_handler(event, context):
     return runtime.handle(event, context)
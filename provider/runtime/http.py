@@ -0,0 +1,132 @@
+"""
+A long-running HTTP server runtime, for hosting a provider in a container.
+
+The server hosts a single initialised provider, and accepts the same events
+as the AWS Lambda runtime as JSON in the body of a POST request:
+
+```
+curl -X POST localhost:8080/ -d '{"type": "describe"}'
+```
+
+A readiness endpoint is served at `GET /ready`, which returns a 200 status
+if the provider is healthy and a 503 status otherwise.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import typing
+
+from pydantic import ValidationError
+
+from provider.runtime import serialize
+from provider.runtime.aws_lambda import AWSLambdaRuntime
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests
+    protocol_version = "HTTP/1.1"
+
+    server: "Server"
+
+    def do_GET(self):
+        if self.path != "/ready":
+            return self._write_json(404, {"error": f"{self.path} not found"})
+
+        healthy = self.server.runtime.provider.healthy()
+        self._write_json(200 if healthy else 503, {"healthy": healthy})
+
+    def do_POST(self):
+        if self.path != "/":
+            return self._write_json(404, {"error": f"{self.path} not found"})
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        try:
+            event = json.loads(body)
+        except ValueError as e:
+            return self._write_json(400, {"error": f"invalid JSON: {e}"})
+
+        try:
+            result = self.server.handle_event(event)
+        except ValidationError as e:
+            return self._write_json(400, {"error": str(e)})
+        except Exception as e:
+            self.log_error("error handling event: %s", e)
+            return self._write_json(500, {"error": str(e)})
+
+        self._write(200, result)
+
+    def _write_json(self, status: int, body: typing.Any):
+        self._write(status, serialize.dumps(body))
+
+    def _write(self, status: int, encoded: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        if self.server.log_requests:
+            super().log_message(format, *args)
+
+
+class Server(ThreadingHTTPServer):
+    """
+    An HTTP server which handles provider events using the AWS Lambda runtime.
+
+    Each connection is handled on its own thread, and is kept alive between
+    requests until it has been idle for `idle_timeout` seconds. Events are
+    executed on a pool of `max_workers` threads, so at most `max_workers`
+    events are handled concurrently however many connections are open.
+    Readiness checks don't use the pool.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: typing.Tuple[str, int],
+        runtime: AWSLambdaRuntime,
+        max_workers: int = 10,
+        idle_timeout: float = 60,
+        log_requests: bool = True,
+    ) -> None:
+        handler = type("Handler", (_Handler,), {"timeout": idle_timeout})
+        super().__init__(address, handler)
+        self.runtime = runtime
+        self.log_requests = log_requests
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="provider-http"
+        )
+
+    def handle_event(self, event: typing.Any) -> bytes:
+        """
+        Handles an event on the worker pool, waiting for a worker if they are all busy.
+        """
+        future = self._executor.submit(
+            self.runtime.handle_json, event=event, context=None
+        )
+        return future.result()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def serve(
+    runtime: AWSLambdaRuntime,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    max_workers: int = 10,
+):
+    """
+    Serves provider events over HTTP until the process is interrupted.
+    """
+    with Server((host, port), runtime=runtime, max_workers=max_workers) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,185 @@
+"""
+Module idempotency stores the results of grant and revoke events, so that
+an event which is retried returns the stored result instead of calling
+the provider's grant or revoke function again.
+
+Events are only deduplicated if they include an access request ID.
+The key for an event is derived from the event type, request ID,
+subject, target kind and target arguments. When a grant succeeds, the
+stored result of the matching revoke is removed, and the reverse, so that
+access which is granted, revoked and granted again is granted each time.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+import typing
+
+from provider import rpc
+
+
+def key(
+    type: typing.Union[typing.Literal["grant"], typing.Literal["revoke"]],
+    data: rpc.GrantData,
+) -> typing.Optional[str]:
+    """
+    Returns the idempotency key for a grant or revoke event,
+    or None if the event doesn't include an access request ID.
+    """
+    if data.request is None:
+        return None
+
+    raw = json.dumps(
+        [type, data.request.id, data.subject, data.target.kind, data.target.arguments],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class Store(ABC):
+    """
+    Stores the results of grant and revoke events by idempotency key.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> typing.Optional[dict]:
+        """
+        Returns the stored result for the key, or None if there isn't one.
+        """
+        pass
+
+    @abstractmethod
+    def put(self, key: str, result: dict):
+        """
+        Stores the result for the key.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Removes the stored result for the key, if there is one.
+        """
+        pass
+
+
+class MemoryStore(Store):
+    """
+    Stores results in memory, so that retries are deduplicated if they are
+    received by the same warm container. Once `max_size` results are stored,
+    the least recently used results are evicted.
+    """
+
+    def __init__(self, max_size: int = 1000) -> None:
+        self.max_size = max_size
+        self._results: typing.OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._results.pop(key, None)
+
+
+class SQLiteStore(Store):
+    """
+    Stores results in a SQLite database file, so that retries are
+    deduplicated across processes on the same host. Useful when running
+    the provider locally or with the HTTP server runtime.
+    """
+
+    def __init__(self, path: str) -> None:
+        # sqlite3 isn't used in AWS Lambda, so it is only loaded when needed.
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency (key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+            )
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, result) VALUES (?, ?)",
+                (key, json.dumps(result)),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM idempotency WHERE key = ?", (key,))
+
+
+class DynamoDBStore(Store):
+    """
+    Stores results in a DynamoDB table, so that retries are deduplicated
+    across every container running the provider.
+
+    The table must have a string partition key named `key`. If `ttl_seconds`
+    is set, an `expires_at` attribute is written with each result, which can
+    be used as the table's TTL attribute.
+    """
+
+    def __init__(
+        self, table_name: str, client=None, ttl_seconds: typing.Optional[int] = None
+    ) -> None:
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            # boto3 is slow to import, so it is only loaded when first used.
+            import boto3
+
+            self._client = boto3.client("dynamodb")
+        return self._client
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        res = self.client.get_item(
+            TableName=self.table_name,
+            Key={"key": {"S": key}},
+            ConsistentRead=True,
+        )
+        item = res.get("Item")
+        if item is None:
+            return None
+        return json.loads(item["result"]["S"])
+
+    def put(self, key: str, result: dict):
+        item = {"key": {"S": key}, "result": {"S": json.dumps(result)}}
+        if self.ttl_seconds is not None:
+            item["expires_at"] = {"N": str(int(time.time()) + self.ttl_seconds)}
+        self.client.put_item(TableName=self.table_name, Item=item)
+
+    def delete(self, key: str):
+        self.client.delete_item(TableName=self.table_name, Key={"key": {"S": key}})
@@ -0,0 +1,115 @@
+"""
+Module metrics times the phases of handling an event, and writes the results
+as CloudWatch Embedded Metric Format (EMF) log lines.
+
+When a line in EMF is written to stdout in AWS Lambda, CloudWatch extracts the
+metrics from it without any API calls being made by the provider. See:
+https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+"""
+
+from contextlib import contextmanager
+import json
+import sys
+import threading
+import time
+import typing
+
+_write_lock = threading.Lock()
+
+
+class Timings:
+    """
+    The time spent in each phase of handling an event, along with
+    counts of the items the event produced.
+
+    Phases which are entered more than once have their durations summed.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.event_type: typing.Optional[str] = None
+        self.spans: typing.Dict[str, float] = {}
+        """the time spent in each phase, in milliseconds"""
+        self.counts: typing.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Times the code run inside the `with` block as the phase `name`.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.monotonic() - start) * 1000
+            with self._lock:
+                self.spans[name] = self.spans.get(name, 0) + elapsed_ms
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def total_ms(self) -> float:
+        return (time.monotonic() - self.started_at) * 1000
+
+    def export(self) -> dict:
+        """
+        Returns the timings as a dict, to be included in a response.
+        """
+        with self._lock:
+            timings = {name: round(ms, 3) for name, ms in self.spans.items()}
+            timings["total"] = round(self.total_ms(), 3)
+            return {"timings_ms": timings, "counts": dict(self.counts)}
+
+    def emf(self, namespace: str) -> dict:
+        """
+        Returns the timings as a CloudWatch Embedded Metric Format object.
+        Metrics are dimensioned by the type of the event.
+        """
+        exported = self.export()
+        values: typing.Dict[str, typing.Union[int, float]] = {}
+        definitions = []
+
+        for name, ms in exported["timings_ms"].items():
+            metric = _metric_name(name) + "Duration"
+            values[metric] = ms
+            definitions.append({"Name": metric, "Unit": "Milliseconds"})
+
+        for name, count in exported["counts"].items():
+            metric = _metric_name(name)
+            values[metric] = count
+            definitions.append({"Name": metric, "Unit": "Count"})
+
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": [["EventType"]],
+                        "Metrics": definitions,
+                    }
+                ],
+            },
+            "EventType": self.event_type or "unknown",
+            **values,
+        }
+
+    def write(self, namespace: str, output: typing.Optional[typing.TextIO] = None):
+        """
+        Writes the timings as a single EMF log line to `output` (stdout by default).
+        """
+        line = json.dumps(self.emf(namespace=namespace), separators=(",", ":"))
+        if output is None:
+            output = sys.stdout
+        with _write_lock:
+            output.write(line + "\n")
+            output.flush()
+
+
+def _metric_name(name: str) -> str:
+    """
+    Converts a phase name like 'user_code' to a metric name like 'UserCode'.
+    """
+    return "".join(part.capitalize() for part in name.split("_"))
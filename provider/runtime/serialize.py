@@ -0,0 +1,59 @@
+"""
+Module serialize converts runtime results to JSON.
+
+If the `orjson` package is installed it is used to encode JSON, otherwise
+the standard library `json` module is used. Both produce the same JSON for
+the values returned by the runtime: dicts, lists, strings, finite numbers,
+booleans and None. Other values, such as datetimes, are encoded by orjson
+but raise a TypeError with `json`, so they must not be returned.
+"""
+
+import json
+import typing
+
+from provider import rpc
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def to_dict(result: rpc.Result) -> dict:
+    """
+    Converts a result to a dict, equivalent to `result.dict(by_alias=True)`.
+
+    Load responses contain resources and tasks which have already been exported
+    as dicts, so these are used as-is rather than being copied by pydantic.
+
+    Optional fields of a load response which aren't set, like the cursor, are
+    left out. The result metadata is only included if it is set.
+    """
+    response = result.response
+    if isinstance(response, rpc.LoadResponse):
+        exported = {"response": _export_load_response(response)}
+    else:
+        exported = result.dict(by_alias=True, exclude={"metadata"})
+
+    if result.metadata is not None:
+        exported["metadata"] = result.metadata
+    return exported
+
+
+def _export_load_response(response: rpc.LoadResponse) -> dict:
+    exported = {}
+    for k in response.__fields__:
+        val = getattr(response, k)
+        if val is not None or response.__fields__[k].required:
+            exported[k] = val
+    return exported
+
+
+def dumps(obj: typing.Any) -> bytes:
+    """
+    Encodes an object as JSON bytes.
+    """
+    if orjson is not None:
+        # non-string keys are converted to strings, as they are by `json`
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
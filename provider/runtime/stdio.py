@@ -0,0 +1,123 @@
+"""
+A runtime which reads newline-delimited JSON events from an input stream,
+such as stdin, and writes one JSON result per line to an output stream.
+
+The provider is initialised once and handles every event, which avoids
+the start up cost of running `provider run` for each event.
+
+If an event can't be handled, a line in the form `{"error": "..."}` is written
+in place of the result, so that each result line corresponds to an event line.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import redirect_stdout
+import json
+import queue
+import sys
+import threading
+import typing
+
+from provider.runtime.aws_lambda import AWSLambdaRuntime
+
+
+def _handle_line(runtime: AWSLambdaRuntime, line: str) -> str:
+    try:
+        event = json.loads(line)
+        return runtime.handle_json(event=event, context=None).decode()
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
+def serve(
+    runtime: AWSLambdaRuntime,
+    input: typing.Optional[typing.TextIO] = None,
+    output: typing.Optional[typing.TextIO] = None,
+    max_workers: int = 1,
+):
+    """
+    Handles events from `input` (stdin by default) until it is closed,
+    writing the results to `output` (stdout by default).
+
+    If `max_workers` is greater than one, events are handled concurrently, but
+    results are always written in the same order that the events were read.
+    Each result is written as soon as it and the results before it are ready,
+    without waiting for further events to be read.
+
+    Any output written to stdout by the provider, for example with print(),
+    is redirected to stderr so that it doesn't interfere with the results.
+    """
+    if input is None:
+        input = sys.stdin
+    if output is None:
+        output = sys.stdout
+
+    with redirect_stdout(sys.stderr):
+        if max_workers <= 1:
+            for line in input:
+                if line.strip() == "":
+                    continue
+                _write(output, _handle_line(runtime, line))
+            return
+
+        _serve_concurrently(
+            runtime=runtime, input=input, output=output, max_workers=max_workers
+        )
+
+
+def _serve_concurrently(
+    runtime: AWSLambdaRuntime,
+    input: typing.TextIO,
+    output: typing.TextIO,
+    max_workers: int,
+):
+    """
+    Handles events on a worker pool. The results are written in order by a
+    separate writer thread, which waits for each result in turn.
+    """
+    # the futures for the events which have been read, in order.
+    # None is added once the input has been closed.
+    pending: "queue.Queue[typing.Optional[Future]]" = queue.Queue()
+
+    # limits the number of events which have been read but not written,
+    # so that a slow event doesn't cause the whole input to be buffered.
+    slots = threading.BoundedSemaphore(max_workers * 2)
+
+    errors: typing.List[BaseException] = []
+
+    def write_results():
+        while True:
+            future = pending.get()
+            if future is None:
+                return
+            try:
+                if len(errors) == 0:
+                    _write(output, future.result())
+            except BaseException as e:
+                # keep consuming results so that the reader isn't blocked
+                errors.append(e)
+            finally:
+                slots.release()
+
+    writer = threading.Thread(
+        target=write_results, name="provider-stdio-writer", daemon=True
+    )
+    writer.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for line in input:
+                if line.strip() == "":
+                    continue
+                slots.acquire()
+                pending.put(executor.submit(_handle_line, runtime, line))
+    finally:
+        pending.put(None)
+        writer.join()
+
+    if len(errors) > 0:
+        raise errors[0]
+
+
+def _write(output: typing.TextIO, line: str):
+    output.write(line + "\n")
+    output.flush()
@@ -1,4 +1,8 @@
+import json
+import os
+import subprocess
 import sys
+import typing
 from os import path
 
 import pytest
@@ -15,3 +19,59 @@ def fresh_namespace():
 def test_entrypoint_works():
     sys.path.append(path.join(path.dirname(__file__)))
     from provider.runtime import aws_lambda_entrypoint
+
+
+def _run_entrypoint(script: str, env: typing.Optional[dict] = None) -> str:
+    """
+    Imports the entrypoint in a fresh interpreter, so that the modules
+    loaded during the cold start can be inspected.
+    """
+    code = (
+        f"import sys; sys.path.append({path.dirname(__file__)!r})\n"
+        "from provider.runtime import aws_lambda_entrypoint\n"
+    ) + script
+    res = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return res.stdout
+
+
+def test_entrypoint_lazily_imports_slow_modules():
+    out = _run_entrypoint(
+        "import json\n"
+        "modules = ['boto3', 'pkg_resources', 'asyncio', 'sqlite3']\n"
+        "print(json.dumps([m in sys.modules for m in modules]))"
+    )
+    assert json.loads(out) == [False, False, False, False]
+
+
+def test_entrypoint_writes_import_time_report():
+    out = _run_entrypoint(
+        "import json\n"
+        "print(json.dumps(aws_lambda_entrypoint.provider.diagnostics.export_logs()))",
+        env={"PROVIDER_IMPORT_TIME_REPORT": "true"},
+    )
+    msgs = [l["msg"] for l in json.loads(out)]
+    assert any(m.startswith("import provider took ") for m in msgs)
+    assert any(m.startswith("import provider_example.provider took ") for m in msgs)
+
+
+def test_entrypoint_import_time_includes_parent_packages():
+    code = (
+        f"import sys; sys.path.append({path.dirname(__file__)!r})\n"
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "from provider.runtime import aws_lambda_entrypoint\n"
+        "total = (time.perf_counter() - start) * 1000\n"
+        "print(json.dumps([aws_lambda_entrypoint.import_times['provider'], total]))"
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    provider_ms, total_ms = json.loads(res.stdout)
+    # importing provider.runtime and its dependencies is most of the cold start
+    assert provider_ms > total_ms / 2
@@ -1,9 +1,13 @@
+import asyncio
+import json
+import typing
+
 from pydantic import BaseModel
 import pytest
 from syrupy.extensions.json import JSONSnapshotExtension
 
-from provider.runtime import AWSLambdaRuntime
-from provider import namespace, access, target, resources, tasks
+from provider.runtime import AWSLambdaRuntime, aws_lambda
+from provider import namespace, access, target, resources, schema, tasks
 import provider
 from provider.tests import helper
 
@@ -239,3 +243,710 @@ def test_revoke_works_with_state():
     # this should be set if the revoke function was
     # called with the correct state.
     assert got_var == "test"
+
+
+def test_describe_caches_schema(runtime_fixture: AWSLambdaRuntime, monkeypatch):
+    calls = 0
+    export_schema = schema.export_schema
+
+    def counting_export_schema(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return export_schema(*args, **kwargs)
+
+    monkeypatch.setattr(schema, "export_schema", counting_export_schema)
+
+    event = {"type": "describe"}
+    first = runtime_fixture.handle(event=event, context=None)
+    runtime_fixture.provider.diagnostics.error("some error happened!")
+    second = runtime_fixture.handle(event=event, context=None)
+
+    # the schema should only be exported once
+    assert calls == 1
+    assert first["response"]["schema"] == second["response"]["schema"]
+
+    # but live fields should be re-read on each call
+    assert first["response"]["healthy"] == True
+    assert second["response"]["healthy"] == False
+
+    # registering a new resource class should invalidate the cached schema
+    class NewResource(resources.Resource):
+        pass
+
+    third = runtime_fixture.handle(event=event, context=None)
+    assert calls == 2
+    assert "NewResource" in third["response"]["schema"]["resources"]["types"]
+
+
+def test_batch_works():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+
+    revoked = []
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        return access.GrantResult(access_instructions=f"{subject}:{target.group}")
+
+    @access.revoke()
+    def revoke(p: Provider, subject: str, target: Target):
+        revoked.append(subject)
+
+    runtime = AWSLambdaRuntime(provider=Provider(), batch_max_workers=2)
+
+    def item(type: str, subject: str, arguments: dict) -> dict:
+        return {
+            "type": type,
+            "data": {
+                "subject": subject,
+                "target": {"kind": "Target", "arguments": arguments},
+            },
+        }
+
+    event = {
+        "type": "batch",
+        "data": {
+            "items": [
+                item("grant", "first", {"group": "a"}),
+                item("revoke", "second", {"group": "b"}),
+                item("grant", "third", {}),  # missing the 'group' argument
+                item("grant", "fourth", {"group": "d"}),
+            ]
+        },
+    }
+    actual = runtime.handle(event=event, context=None)
+
+    assert actual == {
+        "response": {
+            "results": [
+                {
+                    "response": {"access_instructions": "first:a", "state": None},
+                    "error": None,
+                },
+                {"response": None, "error": None},
+                {"response": None, "error": "group argument is required"},
+                {
+                    "response": {"access_instructions": "fourth:d", "state": None},
+                    "error": None,
+                },
+            ]
+        }
+    }
+    assert revoked == ["second"]
+
+
+def test_batch_invalid_item_does_not_fail_batch():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        return access.GrantResult(access_instructions=f"{subject}:{target.group}")
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+
+    target_data = {"kind": "Target", "arguments": {"group": "a"}}
+    event = {
+        "type": "batch",
+        "data": {
+            "items": [
+                {"type": "grant", "data": {"target": target_data}},  # no subject
+                {"type": "grant", "data": {"subject": "second", "target": target_data}},
+            ]
+        },
+    }
+    actual = runtime.handle(event=event, context=None)
+
+    first, second = actual["response"]["results"]
+    assert first["response"] is None
+    assert "subject" in first["error"]
+    assert "field required" in first["error"]
+    assert second == {
+        "response": {"access_instructions": "second:a", "state": None},
+        "error": None,
+    }
+
+
+@pytest.fixture
+def task_tree_runtime():
+    """
+    A provider with a loader which calls a three-level tree of tasks,
+    where each task registers a single resource.
+    """
+
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class LeafTask(tasks.Task):
+        id: str
+
+        def run(self, p: Provider):
+            resources.register(MyResource(id=self.id, name=self.id))
+
+    class BranchTask(tasks.Task):
+        id: str
+
+        def run(self, p: Provider):
+            resources.register(MyResource(id=self.id, name=self.id))
+            for i in range(3):
+                tasks.call(LeafTask(id=f"{self.id}/{i}"))
+
+    @resources.loader
+    def example_loader(p: Provider):
+        for i in range(3):
+            tasks.call(BranchTask(id=f"{i}"))
+
+    return AWSLambdaRuntime(provider=Provider(), load_max_workers=2)
+
+
+def test_load_drain_executes_all_tasks(task_tree_runtime: AWSLambdaRuntime):
+    event = {"type": "load", "data": {"task": "example_loader", "drain": {}}}
+    actual = task_tree_runtime.handle(event=event, context=None)
+
+    ids = sorted(r["id"] for r in actual["response"]["resources"])
+    assert len(ids) == 12
+    assert "2/2" in ids
+    assert actual["response"]["tasks"] == []
+
+
+def test_load_drain_stops_at_resource_limit(task_tree_runtime: AWSLambdaRuntime):
+    event = {
+        "type": "load",
+        "data": {"task": "example_loader", "drain": {"max_resources": 1}},
+    }
+    actual = task_tree_runtime.handle(event=event, context=None)
+
+    got_resources = actual["response"]["resources"]
+    got_tasks = actual["response"]["tasks"]
+
+    # tasks may already be running when the limit is reached,
+    # so some additional resources may be registered
+    assert 1 <= len(got_resources) < 12
+
+    # any work which wasn't completed should be returned as tasks
+    assert len(got_tasks) > 0
+
+
+def test_load_drain_stops_at_duration_limit(task_tree_runtime: AWSLambdaRuntime):
+    event = {
+        "type": "load",
+        "data": {"task": "example_loader", "drain": {"max_duration_ms": 0}},
+    }
+    actual = task_tree_runtime.handle(event=event, context=None)
+
+    assert actual["response"]["resources"] == []
+    assert [t["task"] for t in actual["response"]["tasks"]] == ["BranchTask"] * 3
+
+
+class FakeContext:
+    """
+    A stand-in for the AWS Lambda context object.
+    """
+
+    def __init__(self, remaining_ms: int):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_ms
+
+
+def test_load_drain_stops_at_deadline(task_tree_runtime: AWSLambdaRuntime):
+    event = {"type": "load", "data": {"task": "example_loader", "drain": {}}}
+
+    # the invocation only has the margin left, so no tasks should be started
+    context = FakeContext(remaining_ms=task_tree_runtime.deadline_margin_ms)
+    actual = task_tree_runtime.handle(event=event, context=context)
+
+    assert actual["response"]["resources"] == []
+    assert [t["task"] for t in actual["response"]["tasks"]] == ["BranchTask"] * 3
+
+
+def test_load_drain_stops_at_budget(task_tree_runtime: AWSLambdaRuntime):
+    task_tree_runtime.load_budget_ms = 0
+    event = {"type": "load", "data": {"task": "example_loader", "drain": {}}}
+    actual = task_tree_runtime.handle(event=event, context=FakeContext(60000))
+
+    assert actual["response"]["resources"] == []
+    assert len(actual["response"]["tasks"]) == 3
+
+
+def test_loader_can_checkpoint_before_deadline():
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class Continue(tasks.Task):
+        start: int
+
+        def run(self, p: Provider):
+            load_from(self.start)
+
+    def load_from(start: int):
+        for i in range(start, 10):
+            if tasks.deadline_reached():
+                tasks.call(Continue(start=i))
+                return
+            resources.register(MyResource(id=str(i), name=str(i)))
+
+    @resources.loader
+    def example_loader(p: Provider):
+        seen.append(tasks.remaining_ms())
+        load_from(0)
+
+    seen = []
+    runtime = AWSLambdaRuntime(provider=Provider(), deadline_margin_ms=0)
+
+    event = {"type": "load", "data": {"task": "example_loader"}}
+    actual = runtime.handle(event=event, context=FakeContext(remaining_ms=0))
+    assert actual["response"]["resources"] == []
+    assert actual["response"]["tasks"] == [{"task": "Continue", "ctx": {"start": 0}}]
+
+    actual = runtime.handle(event=event, context=FakeContext(remaining_ms=60000))
+    assert len(actual["response"]["resources"]) == 10
+    assert actual["response"]["tasks"] == []
+
+    # without a context or budget there is no deadline
+    runtime.handle(event=event, context=None)
+    assert seen[1] > 50000
+    assert seen[2] is None
+    assert tasks.remaining_ms() is None
+
+
+@pytest.fixture
+def large_loader_provider():
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class MyTask(tasks.Task):
+        def run(self, p: Provider):
+            pass
+
+    @resources.loader
+    def example_loader(p: Provider):
+        for i in range(100):
+            resources.register(MyResource(id=f"{i:03}", name=f"resource {i:03}"))
+        tasks.call(MyTask())
+
+    return Provider()
+
+
+def _load_all_chunks(runtime: AWSLambdaRuntime):
+    """
+    Sends load events until there is no cursor in the response.
+    """
+    data = {"task": "example_loader", "max_response_bytes": 1000}
+    responses = []
+    while True:
+        actual = runtime.handle(event={"type": "load", "data": data}, context=None)
+        responses.append(actual["response"])
+        if "cursor" not in actual["response"]:
+            return responses
+        data = {**data, "cursor": actual["response"]["cursor"]}
+
+
+def test_load_splits_large_responses(large_loader_provider):
+    runtime = AWSLambdaRuntime(provider=large_loader_provider)
+    responses = _load_all_chunks(runtime)
+
+    assert len(responses) > 1
+    for response in responses:
+        assert len(json.dumps(response["resources"] + response["tasks"])) <= 1000
+
+    ids = [r["id"] for response in responses for r in response["resources"]]
+    assert ids == [f"{i:03}" for i in range(100)]
+
+    # pending tasks should only be returned once
+    assert [len(response["tasks"]) for response in responses].count(1) == 1
+    assert responses[0]["tasks"] == [{"task": "MyTask", "ctx": {}}]
+
+    # the cache should be emptied once the final chunk is returned
+    assert len(runtime._load_cache) == 0
+
+
+def test_load_cursor_expires_in_other_containers(large_loader_provider):
+    data = {"task": "example_loader", "max_response_bytes": 1000}
+    first = AWSLambdaRuntime(provider=large_loader_provider).handle(
+        event={"type": "load", "data": data}, context=None
+    )
+
+    # a different container doesn't have the resources for the cursor cached
+    data = {**data, "cursor": first["response"]["cursor"]}
+    with pytest.raises(aws_lambda.CursorExpiredError):
+        AWSLambdaRuntime(provider=large_loader_provider).handle(
+            event={"type": "load", "data": data}, context=None
+        )
+
+
+def test_async_grant_and_revoke_work():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+
+    revoked = []
+
+    @access.grant()
+    async def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        await asyncio.sleep(0)
+        return access.GrantResult(access_instructions=target.group)
+
+    @access.revoke()
+    async def revoke(p: Provider, subject: str, target: Target):
+        await asyncio.sleep(0)
+        revoked.append(subject)
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+    data = {
+        "subject": "testuser",
+        "target": {"kind": "Target", "arguments": {"group": "admins"}},
+    }
+
+    actual = runtime.handle(event={"type": "grant", "data": data}, context=None)
+    assert actual["response"]["access_instructions"] == "admins"
+
+    runtime.handle(event={"type": "revoke", "data": data}, context=None)
+    assert revoked == ["testuser"]
+
+
+def test_async_loader_and_tasks_work():
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class PageTask(tasks.Task):
+        page: int
+
+        async def run(self, p: Provider):
+            await asyncio.sleep(0)
+            resources.register(MyResource(id=f"task-{self.page}", name="task"))
+
+    async def fetch_page(page: int):
+        await asyncio.sleep(0)
+        resources.register(MyResource(id=str(page), name="page"))
+        tasks.call(PageTask(page=page))
+
+    @resources.loader
+    async def example_loader(p: Provider):
+        await asyncio.gather(*[fetch_page(i) for i in range(10)])
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+
+    event = {"type": "load", "data": {"task": "example_loader", "drain": {}}}
+    actual = runtime.handle(event=event, context=None)
+
+    ids = sorted(r["id"] for r in actual["response"]["resources"])
+    assert ids == sorted([str(i) for i in range(10)] + [f"task-{i}" for i in range(10)])
+    assert actual["response"]["tasks"] == []
+
+
+def test_load_with_fingerprints_returns_changes():
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        val: str
+
+    values = {"1": "a", "2": "b", "3": "c"}
+
+    @resources.loader
+    def example_loader(p: Provider):
+        for id, val in values.items():
+            resources.register(MyResource(id=id, name=id, val=val))
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+
+    # an empty fingerprint set returns all resources, along with their hashes
+    event = {"type": "load", "data": {"task": "example_loader", "fingerprints": {}}}
+    first = runtime.handle(event=event, context=None)["response"]
+    assert len(first["resources"]) == 3
+    assert first["removed"] == {}
+
+    fingerprints = {"MyResource": {r["id"]: r["hash"] for r in first["resources"]}}
+
+    # the hashes should be stable
+    second = runtime.handle(
+        event={
+            "type": "load",
+            "data": {"task": "example_loader", "fingerprints": fingerprints},
+        },
+        context=None,
+    )["response"]
+    assert second["resources"] == []
+    assert second["removed"] == {}
+
+    # change one resource, remove one and add a new one
+    values["1"] = "changed"
+    del values["2"]
+    values["4"] = "d"
+
+    third = runtime.handle(
+        event={
+            "type": "load",
+            "data": {"task": "example_loader", "fingerprints": fingerprints},
+        },
+        context=None,
+    )["response"]
+    assert sorted(r["id"] for r in third["resources"]) == ["1", "4"]
+    assert third["removed"] == {"MyResource": ["2"]}
+
+
+def _load_chunks(runtime: AWSLambdaRuntime, data: dict) -> typing.List[dict]:
+    responses = []
+    while True:
+        actual = runtime.handle(event={"type": "load", "data": data}, context=None)
+        responses.append(actual["response"])
+        if "cursor" not in actual["response"]:
+            return responses
+        data = {**data, "cursor": actual["response"]["cursor"]}
+
+
+def test_load_response_size_includes_edges_and_removed():
+    class Provider(provider.Provider):
+        pass
+
+    class Group(resources.Resource):
+        pass
+
+    class User(resources.Resource):
+        groups: typing.List[str] = resources.Related(Group)
+
+    @resources.loader
+    def example_loader(p: Provider):
+        for i in range(20):
+            groups = [f"group-{i}-{j}" for j in range(3)]
+            resources.register(User(id=str(i), name=str(i), groups=groups))
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+    removed_ids = {f"removed-{i}": "hash" for i in range(40)}
+    data = {
+        "task": "example_loader",
+        "max_response_bytes": 1000,
+        "edges": True,
+        "fingerprints": {"User": removed_ids},
+    }
+    responses = _load_chunks(runtime, data)
+
+    assert len(responses) > 1
+    for response in responses:
+        assert len(json.dumps(response)) <= 1000 + 100
+
+    assert sum(len(r["resources"]) for r in responses) == 20
+    assert sum(len(r.get("edges", [])) for r in responses) == 60
+
+    # the removed resources didn't fit with the final resources,
+    # so they were returned in a response of their own
+    assert responses[-1]["resources"] == []
+    assert responses[-1]["removed"] == {"User": list(removed_ids.keys())}
+
+
+def test_load_writes_metrics(capsys):
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    class MyTask(tasks.Task):
+        pass
+
+    @resources.loader
+    def example_loader(p: Provider):
+        resources.register(MyResource(id="1", name="first"))
+        resources.register(MyResource(id="2", name="second"))
+        tasks.call(MyTask())
+
+    runtime = AWSLambdaRuntime(provider=Provider(), metrics_namespace="Test")
+    got = runtime.handle(
+        event={"type": "load", "data": {"task": "example_loader"}}, context=None
+    )
+    assert "metadata" not in got
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    emf = json.loads(lines[0])
+
+    metrics = emf["_aws"]["CloudWatchMetrics"][0]
+    assert metrics["Namespace"] == "Test"
+    assert metrics["Dimensions"] == [["EventType"]]
+    names = {m["Name"] for m in metrics["Metrics"]}
+    for name in [
+        "ParseDuration",
+        "TasksDuration",
+        "ExportDuration",
+        "SerializeDuration",
+        "TotalDuration",
+    ]:
+        assert name in names
+
+    assert emf["EventType"] == "load"
+    assert emf["Resources"] == 2
+    assert emf["Tasks"] == 1
+
+
+def test_grant_includes_timings(runtime_fixture: AWSLambdaRuntime, capsys):
+    runtime_fixture.include_timings = True
+    event = {
+        "type": "grant",
+        "data": {
+            "subject": "testuser",
+            "target": {"arguments": {"group": "test"}, "kind": "Default"},
+        },
+    }
+    got = runtime_fixture.handle(event=event, context=None)
+
+    assert set(got["metadata"]["timings_ms"]) == {"parse", "access", "total"}
+    got_json = json.loads(runtime_fixture.handle_json(event=event, context=None))
+    assert got_json["response"] == got["response"]
+    assert "metadata" in got_json
+
+    # metrics aren't written unless a namespace is configured
+    assert capsys.readouterr().out == ""
+
+
+def test_failed_event_writes_error_metric(runtime_fixture: AWSLambdaRuntime, capsys):
+    runtime_fixture.metrics_namespace = "Test"
+    event = {
+        "type": "grant",
+        "data": {
+            "subject": "testuser",
+            "target": {"arguments": {}, "kind": "Default"},
+        },
+    }
+    with pytest.raises(Exception):
+        runtime_fixture.handle(event=event, context=None)
+
+    emf = json.loads(capsys.readouterr().out)
+    assert emf["EventType"] == "grant"
+    assert emf["Errors"] == 1
+
+
+def test_load_returns_edges():
+    class Provider(provider.Provider):
+        pass
+
+    class Group(resources.Resource):
+        pass
+
+    class User(resources.Resource):
+        group: typing.Optional[str] = resources.Related(Group)
+        teams: typing.List[str] = resources.Related("Group")
+
+    @resources.loader
+    def example_loader(p: Provider):
+        resources.register(Group(id="admins", name="admins"))
+        resources.register(User(id="1", name="first", group="admins", teams=[]))
+        resources.register(
+            User(id="2", name="second", group="missing", teams=["admins"])
+        )
+        resources.register(User(id="3", name="third", teams=[]))
+
+    p = Provider()
+    runtime = AWSLambdaRuntime(provider=p)
+
+    event = {"type": "load", "data": {"task": "example_loader", "edges": True}}
+    actual = runtime.handle(event=event, context=None)
+
+    def edge(from_id: str, field: str, to_id: str, resolved: bool):
+        return {
+            "from": {"type": "User", "id": from_id},
+            "field": field,
+            "to": {"type": "Group", "id": to_id},
+            "resolved": resolved,
+        }
+
+    assert actual["response"]["edges"] == [
+        edge("1", "group", "admins", True),
+        edge("2", "group", "missing", False),
+        edge("2", "teams", "admins", True),
+    ]
+    # unresolved references are expected, as the index only covers this invocation
+    assert p.diagnostics.export_logs() == []
+
+    # edges are only returned if they are requested
+    event = {"type": "load", "data": {"task": "example_loader"}}
+    actual = runtime.handle(event=event, context=None)
+    assert "edges" not in actual["response"]
+
+
+@pytest.fixture
+def paginated_runtime():
+    """
+    A provider with a paginated loader which fetches 10 pages of 2 resources.
+    """
+
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        pass
+
+    @resources.paginated_loader(max_pages=3)
+    def load_pages(p: Provider, cursor: typing.Optional[str]) -> resources.Page:
+        page = int(cursor or 0)
+        return resources.Page(
+            resources=[
+                MyResource(id=f"{page}/{i}", name=f"{page}/{i}") for i in range(2)
+            ],
+            cursor=str(page + 1) if page < 9 else None,
+        )
+
+    return AWSLambdaRuntime(provider=Provider())
+
+
+def test_paginated_loader_splits_pages_into_tasks(paginated_runtime):
+    event = {"type": "load", "data": {"task": "load_pages"}}
+    actual = paginated_runtime.handle(event=event, context=None)
+
+    assert len(actual["response"]["resources"]) == 6
+    assert actual["response"]["tasks"] == [
+        {"task": "load_pages_next_page", "ctx": {"cursor": "3"}}
+    ]
+
+    event = {
+        "type": "load",
+        "data": {"task": "load_pages_next_page", "ctx": {"cursor": "9"}},
+    }
+    actual = paginated_runtime.handle(event=event, context=None)
+
+    assert [r["id"] for r in actual["response"]["resources"]] == ["9/0", "9/1"]
+    assert actual["response"]["tasks"] == []
+
+
+def test_paginated_loader_with_drain(paginated_runtime):
+    event = {"type": "load", "data": {"task": "load_pages", "drain": {}}}
+    actual = paginated_runtime.handle(event=event, context=None)
+
+    assert len(actual["response"]["resources"]) == 20
+    assert actual["response"]["tasks"] == []
+
+
+def test_paginated_loader_stops_at_deadline(paginated_runtime):
+    event = {"type": "load", "data": {"task": "load_pages"}}
+    context = FakeContext(remaining_ms=paginated_runtime.deadline_margin_ms)
+    actual = paginated_runtime.handle(event=event, context=context)
+
+    # a page is always fetched, so that the loader makes progress
+    assert len(actual["response"]["resources"]) == 2
+    assert actual["response"]["tasks"] == [
+        {"task": "load_pages_next_page", "ctx": {"cursor": "1"}}
+    ]
@@ -0,0 +1,120 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import provider
+from provider import access, namespace, target
+from provider.runtime import AWSLambdaRuntime
+from provider.runtime import http as http_runtime
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    yield
+    namespace.clear()
+
+
+@pytest.fixture
+def server():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        return access.GrantResult(access_instructions=target.group)
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+    server = http_runtime.Server(
+        ("127.0.0.1", 0), runtime=runtime, max_workers=2, log_requests=False
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(conn: http.client.HTTPConnection, method: str, path: str, body=None):
+    encoded = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=encoded)
+    res = conn.getresponse()
+    return res.status, json.loads(res.read())
+
+
+def test_http_server_handles_events(server: http_runtime.Server):
+    conn = http.client.HTTPConnection(*server.server_address)
+
+    # requests should be served on the same kept-alive connection
+    status, body = _request(conn, "GET", "/ready")
+    assert status == 200
+    assert body == {"healthy": True}
+
+    event = {
+        "type": "grant",
+        "data": {
+            "subject": "testuser",
+            "target": {"kind": "Target", "arguments": {"group": "admins"}},
+        },
+    }
+    status, body = _request(conn, "POST", "/", event)
+    assert status == 200
+    assert body["response"]["access_instructions"] == "admins"
+
+    status, body = _request(conn, "POST", "/", {"type": "describe"})
+    assert status == 200
+    assert body["response"]["healthy"] == True
+
+    conn.close()
+
+
+def test_http_server_returns_errors(server: http_runtime.Server):
+    conn = http.client.HTTPConnection(*server.server_address)
+
+    status, _ = _request(conn, "POST", "/", {"type": "unknown"})
+    assert status == 400
+
+    event = {
+        "type": "grant",
+        "data": {"subject": "testuser", "target": {"kind": "Other", "arguments": {}}},
+    }
+    status, body = _request(conn, "POST", "/", event)
+    assert status == 500
+    assert "unhandled target kind Other" in body["error"]
+
+    conn.close()
+
+
+def test_http_server_readiness_reflects_health(server: http_runtime.Server):
+    server.runtime.provider.diagnostics.error("something bad happened")
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    status, body = _request(conn, "GET", "/ready")
+    assert status == 503
+    assert body == {"healthy": False}
+    conn.close()
+
+
+def test_http_server_serves_more_connections_than_workers(
+    server: http_runtime.Server,
+):
+    # keep more connections open than there are workers in the pool
+    conns = []
+    for _ in range(4):
+        conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+        status, _ = _request(conn, "POST", "/", {"type": "describe"})
+        assert status == 200
+        conns.append(conn)
+
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    status, _ = _request(conn, "GET", "/ready")
+    assert status == 200
+    conns.append(conn)
+
+    for conn in conns:
+        conn.close()
@@ -0,0 +1,220 @@
+import boto3
+from botocore.stub import Stubber
+import pytest
+
+import provider
+from provider import access, namespace, target
+from provider.runtime import AWSLambdaRuntime, idempotency
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    yield
+    namespace.clear()
+
+
+@pytest.fixture
+def provider_calls():
+    """
+    Registers a grant and revoke function, returning the provider and
+    a list which records the subject of each call made to them.
+    """
+    calls = []
+
+    class Provider(provider.Provider):
+        pass
+
+    @access.target(kind="Default")
+    class Args:
+        group = target.String()
+
+    @access.grant(kind="Default")
+    def grant(p: Provider, subject: str, target: Args) -> access.GrantResult:
+        calls.append(("grant", subject))
+        return access.GrantResult(access_instructions=f"{subject}:{target.group}")
+
+    @access.revoke(kind="Default")
+    def revoke(p: Provider, subject: str, target: Args):
+        calls.append(("revoke", subject))
+
+    return Provider(), calls
+
+
+def event(type: str, request_id, group: str = "a", subject: str = "testuser"):
+    data = {
+        "subject": subject,
+        "target": {"arguments": {"group": group}, "kind": "Default"},
+    }
+    if request_id is not None:
+        data["request"] = {"id": request_id}
+    return {"type": type, "data": data}
+
+
+@pytest.mark.parametrize("store_factory", ["memory", "sqlite"])
+def test_retried_events_are_deduplicated(provider_calls, store_factory, tmp_path):
+    if store_factory == "memory":
+        store = idempotency.MemoryStore()
+    else:
+        store = idempotency.SQLiteStore(str(tmp_path / "idempotency.db"))
+
+    p, calls = provider_calls
+    runtime = AWSLambdaRuntime(provider=p, idempotency_store=store)
+
+    first = runtime.handle(event("grant", "req_1"), context=None)
+    second = runtime.handle(event("grant", "req_1"), context=None)
+    assert first == second
+    assert first["response"]["access_instructions"] == "testuser:a"
+
+    # a different request or different arguments are not deduplicated
+    runtime.handle(event("grant", "req_2"), context=None)
+    runtime.handle(event("grant", "req_1", group="b"), context=None)
+
+    runtime.handle(event("revoke", "req_1"), context=None)
+    runtime.handle(event("revoke", "req_1"), context=None)
+
+    assert calls == [
+        ("grant", "testuser"),
+        ("grant", "testuser"),
+        ("grant", "testuser"),
+        ("revoke", "testuser"),
+    ]
+
+
+def test_events_without_request_are_not_deduplicated(provider_calls):
+    p, calls = provider_calls
+    runtime = AWSLambdaRuntime(provider=p, idempotency_store=idempotency.MemoryStore())
+
+    runtime.handle(event("grant", None), context=None)
+    runtime.handle(event("grant", None), context=None)
+
+    assert calls == [("grant", "testuser"), ("grant", "testuser")]
+
+
+def test_batch_items_are_deduplicated(provider_calls):
+    p, calls = provider_calls
+    runtime = AWSLambdaRuntime(provider=p, idempotency_store=idempotency.MemoryStore())
+    runtime.handle(event("grant", "req_1", subject="first"), context=None)
+
+    batch = {
+        "type": "batch",
+        "data": {
+            "items": [
+                event("grant", "req_1", subject="first"),
+                event("grant", "req_2", subject="second"),
+            ]
+        },
+    }
+    got = runtime.handle(batch, context=None)
+
+    assert [
+        r["response"]["access_instructions"] for r in got["response"]["results"]
+    ] == [
+        "first:a",
+        "second:a",
+    ]
+    assert calls == [("grant", "first"), ("grant", "second")]
+
+
+def test_revoke_clears_stored_grant(provider_calls):
+    p, calls = provider_calls
+    runtime = AWSLambdaRuntime(provider=p, idempotency_store=idempotency.MemoryStore())
+
+    runtime.handle(event("grant", "req_1"), context=None)
+    runtime.handle(event("revoke", "req_1"), context=None)
+    runtime.handle(event("grant", "req_1"), context=None)
+    runtime.handle(event("revoke", "req_1"), context=None)
+
+    assert calls == [
+        ("grant", "testuser"),
+        ("revoke", "testuser"),
+        ("grant", "testuser"),
+        ("revoke", "testuser"),
+    ]
+
+
+class FailingStore(idempotency.Store):
+    def get(self, key: str):
+        raise Exception("store is unavailable")
+
+    def put(self, key: str, result: dict):
+        raise Exception("store is unavailable")
+
+    def delete(self, key: str):
+        raise Exception("store is unavailable")
+
+
+def test_store_errors_do_not_fail_events(provider_calls):
+    p, calls = provider_calls
+    runtime = AWSLambdaRuntime(provider=p, idempotency_store=FailingStore())
+
+    got = runtime.handle(event("grant", "req_1"), context=None)
+
+    assert got["response"]["access_instructions"] == "testuser:a"
+    assert calls == [("grant", "testuser")]
+    assert [l["msg"] for l in p.diagnostics.export_logs()] == [
+        "reading idempotency result failed: store is unavailable",
+        "storing idempotency result failed: store is unavailable",
+        "removing idempotency result failed: store is unavailable",
+    ]
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = idempotency.MemoryStore(max_size=2)
+    store.put("a", {"val": 1})
+    store.put("b", {"val": 2})
+    store.get("a")
+    store.put("c", {"val": 3})
+
+    assert store.get("a") == {"val": 1}
+    assert store.get("b") is None
+    assert store.get("c") == {"val": 3}
+
+    store.delete("a")
+    assert store.get("a") is None
+
+
+def test_dynamodb_store():
+    client = boto3.client("dynamodb", region_name="us-east-1")
+    stubber = Stubber(client)
+    store = idempotency.DynamoDBStore(table_name="idempotency", client=client)
+
+    stubber.add_response(
+        "get_item",
+        {},
+        {
+            "TableName": "idempotency",
+            "Key": {"key": {"S": "a"}},
+            "ConsistentRead": True,
+        },
+    )
+    stubber.add_response(
+        "put_item",
+        {},
+        {
+            "TableName": "idempotency",
+            "Item": {"key": {"S": "a"}, "result": {"S": '{"val": 1}'}},
+        },
+    )
+    stubber.add_response(
+        "get_item",
+        {"Item": {"key": {"S": "a"}, "result": {"S": '{"val": 1}'}}},
+        {
+            "TableName": "idempotency",
+            "Key": {"key": {"S": "a"}},
+            "ConsistentRead": True,
+        },
+    )
+
+    stubber.add_response(
+        "delete_item",
+        {},
+        {"TableName": "idempotency", "Key": {"key": {"S": "a"}}},
+    )
+
+    with stubber:
+        assert store.get("a") is None
+        store.put("a", {"val": 1})
+        assert store.get("a") == {"val": 1}
+        store.delete("a")
+
+    stubber.assert_no_pending_responses()
@@ -1,7 +1,16 @@
+import pytest
+
 import provider
+from provider import namespace
 from provider.runtime import initialise
 
 
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    yield
+    namespace.clear()
+
+
 def test_lambda_runtime_calls_provider_setup():
     class MyProvider(provider.Provider):
         def setup(self):
@@ -0,0 +1,106 @@
+import json
+import typing
+
+from pydantic import BaseModel
+import pytest
+
+import provider
+from provider import namespace, resources, rpc, tasks
+from provider.runtime import AWSLambdaRuntime, serialize
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    yield
+    namespace.clear()
+
+
+@pytest.fixture
+def runtime():
+    class Provider(provider.Provider):
+        pass
+
+    class MyResource(resources.Resource):
+        val: str
+
+    class MyTask(tasks.Task):
+        val: str
+
+    @resources.loader
+    def example_loader(p: Provider):
+        resources.register(MyResource(id="123", name="name", val="first"))
+        resources.register(MyResource(id="456", val="second", name="résumé"))
+        tasks.call(MyTask(val="test"))
+
+    return AWSLambdaRuntime(provider=Provider())
+
+
+def test_to_dict_matches_pydantic(runtime: AWSLambdaRuntime):
+    event = {"type": "load", "data": {"task": "example_loader"}}
+    result = runtime._do_handle(event=event, context=None)
+
+    # unset optional fields of the load response are left out
+    assert serialize.to_dict(result) == result.dict(
+        by_alias=True, exclude={"metadata"}, exclude_none=True
+    )
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_handle_json_matches_handle(runtime: AWSLambdaRuntime, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialize, "orjson", None)
+    elif serialize.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    for event in [
+        {"type": "load", "data": {"task": "example_loader"}},
+        {"type": "describe"},
+    ]:
+        got = runtime.handle_json(event=event, context=None)
+        assert isinstance(got, bytes)
+        assert json.loads(got) == runtime.handle(event=event, context=None)
+
+
+def test_nested_models_are_exported_as_dicts():
+    class Provider(provider.Provider):
+        pass
+
+    class Inner(BaseModel):
+        x: str
+
+    class NestedResource(resources.Resource):
+        inner: Inner
+        items: typing.List[Inner] = []
+
+    @resources.loader
+    def nested_loader(p: Provider):
+        resources.register(
+            NestedResource(
+                id="1", name="first", inner=Inner(x="y"), items=[Inner(x="z")]
+            )
+        )
+        resources.register_many(
+            NestedResource, [{"id": "2", "name": "second", "inner": Inner(x="y")}]
+        )
+
+    runtime = AWSLambdaRuntime(provider=Provider())
+    event = {"type": "load", "data": {"task": "nested_loader"}}
+    got = runtime.handle(event=event, context=None)
+
+    assert [r["data"] for r in got["response"]["resources"]] == [
+        {"inner": {"x": "y"}, "items": [{"x": "z"}]},
+        {"inner": {"x": "y"}, "items": []},
+    ]
+    assert json.loads(json.dumps(got)) == got
+    assert json.loads(runtime.handle_json(event=event, context=None)) == got
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_is_the_same_with_both_backends(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialize, "orjson", None)
+    elif serialize.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    got = serialize.dumps({"name": "résumé", "counts": {1: 2}, "ok": [True, None, 1.5]})
+    assert got == '{"name":"résumé","counts":{"1":2},"ok":[true,null,1.5]}'.encode()
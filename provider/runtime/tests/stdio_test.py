@@ -0,0 +1,96 @@
+import io
+import json
+import time
+
+import pytest
+
+import provider
+from provider import access, namespace, target
+from provider.runtime import AWSLambdaRuntime
+from provider.runtime import stdio
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    yield
+    namespace.clear()
+
+
+@pytest.fixture
+def runtime():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class Target:
+        group = target.String()
+        delay = target.String()
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: Target) -> access.GrantResult:
+        print("this should be written to stderr")
+        time.sleep(float(target.delay))
+        return access.GrantResult(access_instructions=subject)
+
+    return AWSLambdaRuntime(provider=Provider())
+
+
+def _grant_event(subject: str, delay: float = 0) -> str:
+    event = {
+        "type": "grant",
+        "data": {
+            "subject": subject,
+            "target": {
+                "kind": "Target",
+                "arguments": {"group": "admins", "delay": str(delay)},
+            },
+        },
+    }
+    return json.dumps(event)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_stdio_writes_a_result_per_event(runtime, max_workers, capsys):
+    lines = [
+        _grant_event("first", delay=0.05),
+        "not json",
+        "",
+        _grant_event("second"),
+        json.dumps({"type": "describe"}),
+    ]
+    input = io.StringIO("\n".join(lines) + "\n")
+    output = io.StringIO()
+
+    stdio.serve(runtime=runtime, input=input, output=output, max_workers=max_workers)
+
+    results = [json.loads(l) for l in output.getvalue().splitlines()]
+
+    # results should be written in the same order as the events,
+    # even if later events finish first
+    assert len(results) == 4
+    assert results[0]["response"]["access_instructions"] == "first"
+    assert "error" in results[1]
+    assert results[2]["response"]["access_instructions"] == "second"
+    assert results[3]["response"]["healthy"] == True
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "this should be written to stderr" in captured.err
+
+
+def test_stdio_writes_results_before_input_is_closed(runtime):
+    output = io.StringIO()
+    written_before_close = []
+
+    def input_lines():
+        yield _grant_event("first", delay=0.1) + "\n"
+
+        # wait for the result before closing the input
+        deadline = time.monotonic() + 5
+        while output.getvalue() == "" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        written_before_close.append(output.getvalue())
+
+    stdio.serve(runtime=runtime, input=input_lines(), output=output, max_workers=4)
+
+    assert len(written_before_close[0].splitlines()) == 1
@@ -1,5 +1,5 @@
+import functools
 import typing
-from pkg_resources import get_distribution
 from provider import namespace, resources, target
 from common_fate_schema.provider import v1alpha1
 
@@ -11,11 +11,7 @@ def export_schema(id: typing.Optional[v1alpha1.ID] = None) -> v1alpha1.Schema:
 
     Provider = namespace.get_provider()
 
-    framework_version = None
-    try:
-        framework_version = get_distribution("provider").version
-    except Exception:
-        pass
+    framework_version = _framework_version()
 
     config_schema = Provider.export_config_schema()
     resources_schema = resources.export_schema()
@@ -31,3 +27,19 @@ def export_schema(id: typing.Optional[v1alpha1.ID] = None) -> v1alpha1.Schema:
     )
 
     return schema
+
+
+@functools.lru_cache(maxsize=None)
+def _framework_version() -> typing.Optional[str]:
+    """
+    Returns the installed version of the PDK. The version doesn't change
+    while the provider is running, so it is only looked up once.
+    """
+    try:
+        # pkg_resources is slow to import, so it is only loaded
+        # when a schema is actually exported.
+        from pkg_resources import get_distribution
+
+        return get_distribution("provider").version
+    except Exception:
+        return None
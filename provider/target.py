@@ -18,19 +18,100 @@ class Option:
 _T = typing.TypeVar("_T")
 
 
+def _fields(cls: type) -> typing.Tuple[str, ...]:
+    """
+    Returns the names of the argument fields defined on a Target class.
+    """
+    return tuple(k for k in vars(cls).keys() if not k.startswith("__"))
+
+
+class Binder:
+    """
+    Binds the arguments of a grant or revoke event to an instance of a Target class.
+
+    A binder is compiled once, when the Target class is registered, so that
+    binding arguments only requires a single pass over the fields.
+    """
+
+    __slots__ = ("cls", "fields", "string_fields", "_set_dict")
+
+    def __init__(self, cls: type) -> None:
+        self.cls = cls
+        self.fields = _fields(cls)
+        self.string_fields = frozenset(
+            k for k in self.fields if isinstance(vars(cls)[k], Field)
+        )
+        """fields declared with target.String() or target.Resource(), which must be strings"""
+
+        # arguments can be written straight to the instance __dict__,
+        # unless a field is a descriptor (like a property).
+        self._set_dict = not any(hasattr(vars(cls)[k], "__set__") for k in self.fields)
+
+    def bind(self, raw_targets: dict) -> typing.Any:
+        """
+        Returns an instance of the Target class with the arguments assigned.
+
+        Raises ParseError listing every missing, extra or invalid argument.
+        """
+        values = {}
+        missing = []
+        invalid = []
+        for k in self.fields:
+            val = raw_targets.get(k, _MISSING)
+            if val is _MISSING:
+                missing.append(k)
+                continue
+            if k in self.string_fields and not isinstance(val, str):
+                invalid.append(k)
+            values[k] = val
+
+        if len(values) != len(raw_targets) or missing or invalid:
+            raise ParseError(
+                self._describe_errors(raw_targets, missing=missing, invalid=invalid)
+            )
+
+        instance = self.cls()
+        if self._set_dict:
+            instance.__dict__.update(values)
+        else:
+            for k, val in values.items():
+                setattr(instance, k, val)
+        return instance
+
+    def _describe_errors(
+        self, raw_targets: dict, missing: typing.List[str], invalid: typing.List[str]
+    ) -> str:
+        errors = []
+        if len(missing) == 1:
+            errors.append(f"{missing[0]} argument is required")
+        elif len(missing) > 1:
+            errors.append(f"{', '.join(missing)} arguments are required")
+
+        for k in invalid:
+            errors.append(f"{k} argument must be a string")
+
+        extra = [k for k in raw_targets.keys() if k not in self.fields]
+        if len(extra) == 1:
+            errors.append(f"{extra[0]} argument is not supported")
+        elif len(extra) > 1:
+            errors.append(f"{', '.join(extra)} arguments are not supported")
+
+        return "; ".join(errors)
+
+
+_MISSING = object()
+
+
 def _initialise(cls: type[_T], raw_targets: dict) -> _T:
-    # initialise an instance of the Target class 'cls'
-    instance = cls()
-
-    # assign each variable in the class based on the 'raw_targets' dict
-    all_vars = [k for k in vars(cls).keys() if not k.startswith("__")]
-    for k in all_vars:
-        if k not in raw_targets:
-            raise ParseError(f"{k} argument is required")
-        val = raw_targets[k]
-        setattr(instance, k, val)
-
-    return instance
+    """
+    Initialises an instance of the Target class 'cls' from the arguments
+    in 'raw_targets', using the binder compiled when the class was
+    registered if there is one.
+    """
+    binder = namespace.get_target_binder(cls)
+    if binder is None:
+        binder = Binder(cls)
+    return binder.bind(raw_targets)
 
 
 @dataclass
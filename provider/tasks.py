@@ -1,11 +1,14 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import threading
+import time
 import typing
-from provider import namespace
+from provider import eventloop, namespace
 import provider
 
 from provider.dataclass import ModelMeta
 
 
-LoaderFunc = typing.Callable[[typing.Any], None]
+LoaderFunc = typing.Callable[[typing.Any], typing.Union[None, typing.Awaitable[None]]]
 
 
 P = typing.TypeVar("P", bound=provider.Provider)
@@ -15,30 +18,90 @@ class Task(metaclass=ModelMeta):
     def __init__(self, **data: typing.Any) -> None:
         setattr(self, "__dict__", data)
 
+    def __init_subclass__(cls) -> None:
+        namespace.register_task_class(cls)
+        return super().__init_subclass__()
+
     def json(self) -> dict:
         return {"task": self.__class__.__name__, "ctx": self.__dict__}
 
     def run(self, p) -> None:
         """
         Runs the task to fetch resources.
+
+        This method may be overridden with an `async def` method,
+        in which case it is run on an event loop shared by the provider.
         """
         raise Exception("the run method must be implemented")
 
 
 _PENDING_TASKS: typing.List[Task] = []
 
+_PENDING_TASKS_LOCK = threading.Lock()
+
+_DEADLINE: typing.Optional[float] = None
+"""
+The time.monotonic() value by which the current load event should
+stop starting new work, or None if there is no deadline.
+"""
+
 
 def _reset():
+    global _PENDING_TASKS, _DEADLINE
+    with _PENDING_TASKS_LOCK:
+        _PENDING_TASKS = []
+    _DEADLINE = None
+
+
+def _set_deadline(deadline: typing.Optional[float]):
+    global _DEADLINE
+    _DEADLINE = deadline
+
+
+def remaining_ms() -> typing.Optional[float]:
+    """
+    Returns the number of milliseconds left before the current load event
+    should stop starting new work, or None if there is no deadline.
+
+    Long-running loaders and tasks can use this to stop early and
+    `call()` a task to continue their work in another invocation,
+    rather than the invocation timing out and losing the resources
+    registered so far.
+    """
+    deadline = _DEADLINE
+    if deadline is None:
+        return None
+    return (deadline - time.monotonic()) * 1000
+
+
+def deadline_reached() -> bool:
+    """
+    Returns True if the current load event has reached its deadline.
+    """
+    remaining = remaining_ms()
+    return remaining is not None and remaining <= 0
+
+
+def _take() -> typing.List[Task]:
+    """
+    Removes and returns all of the pending tasks.
+    """
     global _PENDING_TASKS
-    _PENDING_TASKS = []
+    with _PENDING_TASKS_LOCK:
+        pending = _PENDING_TASKS
+        _PENDING_TASKS = []
+    return pending
 
 
 def call(task: Task):
     """
     Registers the intent to call an async task. The task will be deferred
     and executed in the future.
+
+    This is safe to call from concurrently running tasks and coroutines.
     """
-    _PENDING_TASKS.append(task)
+    with _PENDING_TASKS_LOCK:
+        _PENDING_TASKS.append(task)
 
 
 def _execute(provider: provider.Provider, task: str, ctx: typing.Optional[dict]):
@@ -54,16 +117,14 @@ def _execute(provider: provider.Provider, task: str, ctx: typing.Optional[dict])
     # check if we have a top-level resource loader registered under the name
     resource_loader = namespace._RESOURCE_LOADERS.get(task)
     if resource_loader is not None:
-        return resource_loader(provider)
+        return eventloop.resolve(resource_loader(provider))
 
     if ctx is None:
         ctx = {}
 
-    for Klass in Task.__subclasses__():
-        # todo: handle ambiguity in task class naming
-        if Klass.__name__ == task:
-            task = Klass(**ctx)
-            return task.run(provider)
+    Klass = namespace.get_task_classes().get(task)
+    if Klass is not None:
+        return eventloop.resolve(Klass(**ctx).run(provider))
 
     # if we get here, we couldn't find the task.
     raise Exception(f"could not find task {task}")
@@ -71,3 +132,58 @@ def _execute(provider: provider.Provider, task: str, ctx: typing.Optional[dict])
 
 def get() -> typing.List[Task]:
     return _PENDING_TASKS
+
+
+def _drain(
+    provider: provider.Provider,
+    should_continue: typing.Callable[[], bool],
+    max_workers: int = 10,
+):
+    """
+    Executes pending tasks in-process on a worker pool, along with any
+    tasks that they call, until there are no tasks left, `should_continue`
+    returns False or the deadline is reached.
+
+    Tasks which were not started are left pending, so that they
+    can be returned to the caller as usual.
+
+    If a task raises an exception, no further tasks are started and
+    the exception is raised once the running tasks have finished.
+    """
+    queue = _take()
+    running: typing.Set[Future] = set()
+    error: typing.Optional[BaseException] = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while (
+                error is None
+                and len(queue) > 0
+                and len(running) < max_workers
+                and not deadline_reached()
+                and should_continue()
+            ):
+                task = queue.pop(0)
+                running.add(executor.submit(_run, task, provider))
+
+            if len(running) == 0:
+                break
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                if error is None and future.exception() is not None:
+                    error = future.exception()
+
+            # pick up any tasks called by the tasks which just finished
+            queue.extend(_take())
+
+    # return the tasks which weren't started to the pending list
+    with _PENDING_TASKS_LOCK:
+        _PENDING_TASKS[0:0] = queue
+
+    if error is not None:
+        raise error
+
+
+def _run(task: Task, provider: provider.Provider):
+    return eventloop.resolve(task.run(provider))
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from pydantic import BaseModel
 import pytest
 
-from provider import access, namespace, rpc
+from provider import access, namespace, rpc, target
 import provider
 
 
@@ -157,3 +157,42 @@ def test_call_revoke_passes_request_id():
     )
 
     assert got_var == "req_123"
+
+
+def test_revoke_with_unsupported_state_type_fails_at_registration():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class ExampleTarget:
+        pass
+
+    with pytest.raises(TypeError):
+
+        @access.revoke()
+        def revoke(p: Provider, subject: str, target: ExampleTarget, state: str):
+            pass
+
+
+def test_grant_registers_call_plan():
+    class Provider(provider.Provider):
+        pass
+
+    @access.target()
+    class ExampleTarget:
+        group = target.String()
+
+    class State(BaseModel):
+        my_val: str
+
+    @access.grant()
+    def grant(p: Provider, subject: str, target: ExampleTarget, state: State):
+        pass
+
+    plan = namespace.get_target_classes()["ExampleTarget"].get_grant_plan()
+
+    assert plan.func == grant
+    assert plan.binder.fields == ("group",)
+    assert plan.uses_state == True
+    assert plan.state_model == State
+    assert plan.uses_request == False
@@ -0,0 +1,40 @@
+from provider import diagnostics
+
+
+def test_logs_are_bounded():
+    logs = diagnostics.Logs(max_logs=3)
+    logs.error("first")
+    for i in range(4):
+        logs.info(f"info {i}")
+
+    assert logs.dropped == 2
+    assert logs.info_count == 4
+    assert logs.error_count == 1
+
+    # the dropped error should still mark the logs as having errors
+    assert logs.has_no_errors() == False
+
+    assert logs.export_logs() == [
+        {"level": "INFO", "msg": "2 older diagnostic messages were dropped"},
+        {"level": "INFO", "msg": "info 1"},
+        {"level": "INFO", "msg": "info 2"},
+        {"level": "INFO", "msg": "info 3"},
+    ]
+
+
+def test_logs_with_timestamps_and_fields():
+    logs = diagnostics.Logs(timestamps=True)
+    logs.info("something happened", user="testuser")
+
+    exported = logs.export_logs()
+    assert exported[0]["msg"] == "something happened"
+    assert exported[0]["fields"] == {"user": "testuser"}
+    assert isinstance(exported[0]["timestamp"], float)
+
+
+def test_logs_without_errors_are_healthy():
+    logs = diagnostics.Logs()
+    logs.info("something happened")
+
+    assert logs.has_no_errors() == True
+    assert logs.export_logs() == [{"level": "INFO", "msg": "something happened"}]
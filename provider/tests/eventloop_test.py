@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from provider import eventloop
+
+
+def test_resolve_returns_non_awaitable_values():
+    assert eventloop.resolve("value") == "value"
+    assert eventloop.resolve(None) is None
+
+
+def test_resolve_runs_coroutines():
+    async def example():
+        await asyncio.sleep(0)
+        return "value"
+
+    assert eventloop.resolve(example()) == "value"
+
+
+def test_resolve_reuses_event_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = eventloop.resolve(current_loop())
+    second = eventloop.resolve(current_loop())
+
+    assert first is second
+    assert first is eventloop.get_loop()
+
+
+def test_resolve_raises_exceptions():
+    async def fails():
+        raise ValueError("something bad happened")
+
+    with pytest.raises(ValueError, match="something bad happened"):
+        eventloop.resolve(fails())
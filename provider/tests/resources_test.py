@@ -50,3 +50,89 @@ def test_resource_schema_works_with_unnamed_resources(snapshot_json):
 
     got = resources.export_schema()
     assert got.dict() == snapshot_json
+
+
+def test_resource_schema_is_cached():
+    class MyResource(resources.Resource):
+        value: str
+
+    first = resources.export_schema()
+    assert resources.export_schema() is first
+
+    # registering another class invalidates the cached schema
+    class OtherResource(resources.Resource):
+        pass
+
+    second = resources.export_schema()
+    assert second is not first
+    assert "OtherResource" in second.types
+
+
+def test_register_many_exports_same_as_register():
+    class MyResource(resources.Resource):
+        value: str
+        optional_value: typing.Optional[str] = "default"
+
+    class NoName(resources.BaseResource):
+        value: str
+
+    resources._reset()
+    resources.register(MyResource(id="1", name="first", value="a"))
+    resources.register(NoName(id="2", value="b"))
+    want = list(resources._collect().export())
+
+    resources._reset()
+    resources.register_many(MyResource, [{"id": "1", "name": "first", "value": "a"}])
+    resources.register_many(NoName, ({"id": "2", "value": "b"} for _ in range(1)))
+    got = list(resources._collect().export())
+
+    assert got == want
+    assert resources._count() == 2
+
+
+def test_get_includes_register_many_rows():
+    class MyResource(resources.Resource):
+        value: str
+        optional_value: typing.Optional[str] = "default"
+
+    class NoName(resources.BaseResource):
+        value: str
+
+    resources._reset()
+    resources.register(MyResource(id="0", name="zero", value="z"))
+    resources.register_many(MyResource, [{"id": "1", "name": "first", "value": "a"}])
+    resources.register_many(NoName, [{"id": "2", "value": "b"}])
+
+    assert resources.get() == [
+        MyResource(id="0", name="zero", value="z"),
+        MyResource(id="1", name="first", value="a"),
+        NoName(id="2", value="b"),
+    ]
+    assert [type(r) for r in resources.get()] == [MyResource, MyResource, NoName]
+
+
+def test_register_many_export_with_offset():
+    class MyResource(resources.Resource):
+        pass
+
+    class OtherResource(resources.Resource):
+        pass
+
+    resources._reset()
+    resources.register(MyResource(id="0", name="0"))
+    resources.register_many(MyResource, [{"id": str(i), "name": "x"} for i in (1, 2)])
+    resources.register_many(OtherResource, [{"id": "3", "name": "x"}])
+
+    collected = resources._collect()
+    assert len(collected) == 4
+    assert [r["id"] for r in collected.export(offset=2)] == ["2", "3"]
+    assert [r["id"] for r in collected.export(offset=3)] == ["3"]
+
+
+def test_register_many_requires_required_fields():
+    class MyResource(resources.Resource):
+        value: str
+
+    resources._reset()
+    with pytest.raises(KeyError):
+        resources.register_many(MyResource, [{"id": "1", "name": "first"}])
@@ -0,0 +1,83 @@
+import pytest
+from pydantic import ValidationError
+
+from provider import rpc
+
+VALID_EVENTS = [
+    {"type": "describe"},
+    {
+        "type": "grant",
+        "data": {
+            "subject": "testuser",
+            "target": {"kind": "Target", "arguments": {"group": "admins"}},
+            "request": {"id": "req_123"},
+        },
+    },
+    {
+        "type": "revoke",
+        "data": {
+            "subject": "testuser",
+            "target": {"kind": "Target", "arguments": {}},
+            "state": {"nested": {"value": [1, 2, 3]}},
+        },
+    },
+    {"type": "load", "data": {"task": "example_loader"}},
+    {"type": "load", "data": {"task": "MyTask", "ctx": {"val": "test"}}},
+    {
+        "type": "batch",
+        "data": {
+            "items": [
+                {
+                    "type": "grant",
+                    "data": {
+                        "subject": "testuser",
+                        "target": {"kind": "Target", "arguments": {}},
+                    },
+                }
+            ]
+        },
+    },
+]
+
+
+@pytest.mark.parametrize("event", VALID_EVENTS)
+def test_parse_event_matches_event_model(event):
+    got = rpc.parse_event(event)
+    want = rpc.Event.parse_obj(event).__root__
+    assert got == want
+
+
+def test_parse_event_passes_state_through():
+    state = {"nested": {"value": [1, 2, 3]}}
+    event = {
+        "type": "revoke",
+        "data": {
+            "subject": "testuser",
+            "target": {"kind": "Target", "arguments": {}},
+            "state": state,
+        },
+    }
+    got = rpc.parse_event(event)
+    assert got.data.state is state
+
+
+INVALID_EVENTS = [
+    {"type": "grant", "data": {"target": {"kind": "Target", "arguments": {}}}},
+    {"type": "grant", "data": {"subject": "testuser", "state": {}}},
+    {"type": "load", "data": {"task": "example_loader", "ctx": "not a dict"}},
+    {"type": "load", "data": {"ctx": {}}},
+    {"type": "unknown"},
+    {"data": {}},
+    "not an object",
+]
+
+
+@pytest.mark.parametrize("event", INVALID_EVENTS)
+def test_parse_event_errors_match_event_model(event):
+    with pytest.raises(ValidationError) as want:
+        rpc.Event.parse_obj(event)
+
+    with pytest.raises(ValidationError) as got:
+        rpc.parse_event(event)
+
+    assert str(got.value) == str(want.value)
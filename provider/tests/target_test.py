@@ -32,6 +32,35 @@ def test_parse_args_missing_required():
         target._initialise(ExampleArgs, {})
 
 
+def test_parse_args_reports_all_errors():
+    @access.target()
+    class MultipleArgs:
+        group = target.String()
+        account = target.String()
+        role = target.String()
+
+    with pytest.raises(target.ParseError) as e:
+        target._initialise(MultipleArgs, {"role": 1, "other": "x"})
+
+    assert str(e.value) == (
+        "group, account arguments are required; "
+        "role argument must be a string; "
+        "other argument is not supported"
+    )
+
+
+def test_initialise_uses_registered_binder():
+    @access.target()
+    class RegisteredArgs:
+        group = target.String()
+
+    binder = namespace.get_target_binder(RegisteredArgs)
+    assert binder is namespace.get_target_classes()["RegisteredArgs"].binder
+    got = target._initialise(RegisteredArgs, {"group": "test"})
+    assert got.group == "test"
+    assert type(got) is RegisteredArgs
+
+
 def test_export_target_schema(snapshot_json):
     @access.target()
     class ExampleTarget:
@@ -0,0 +1,62 @@
+import pytest
+
+import provider
+from provider import namespace, resources, tasks
+
+
+@pytest.fixture(autouse=True)
+def fresh_namespace():
+    """clear the registered provider, targets etc between test runs"""
+    yield
+    namespace.clear()
+
+
+def test_execute_finds_indirect_subclasses():
+    class Provider(provider.Provider):
+        pass
+
+    got_val = None
+
+    class BaseTask(tasks.Task):
+        pass
+
+    class NestedTask(BaseTask):
+        val: str
+
+        def run(self, p: Provider):
+            nonlocal got_val
+            got_val = self.val
+
+    tasks._execute(provider=Provider(), task="NestedTask", ctx={"val": "test"})
+
+    assert got_val == "test"
+
+
+def test_duplicate_task_names_raise():
+    class MyTask(tasks.Task):
+        pass
+
+    generation = namespace.get_generation()
+    with pytest.raises(Exception):
+        # use type() to create a class with the same name but a different qualname
+        type("MyTask", (tasks.Task,), {"__qualname__": "Other.MyTask"})
+
+    # a rejected task class doesn't invalidate anything cached
+    assert namespace.get_generation() == generation
+
+
+def test_task_name_clashing_with_loader_raises():
+    @resources.loader
+    def load_things(p):
+        pass
+
+    with pytest.raises(Exception):
+        type("load_things", (tasks.Task,), {})
+
+
+def test_execute_unknown_task_raises():
+    class Provider(provider.Provider):
+        pass
+
+    with pytest.raises(Exception, match="could not find task Missing"):
+        tasks._execute(provider=Provider(), task="Missing", ctx={})